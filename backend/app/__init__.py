@@ -0,0 +1,9 @@
+import time
+
+# Taken before any submodule is imported, so /health/startup can report import time
+IMPORT_STARTED = time.perf_counter()
+
+from dotenv import load_dotenv
+
+# Load .env once, before any module reads its settings from the environment
+load_dotenv()
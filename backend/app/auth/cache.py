@@ -0,0 +1,81 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..models.database import User
+
+# Set PRINCIPAL_CACHE_TTL=0 to disable caching entirely. invalidate() only reaches this
+# process: other workers drop an entry when the subject is revoked (deactivation, deletion,
+# rename), within REVOCATION_SYNC_INTERVAL, and otherwise serve changes made elsewhere, such
+# as an email or an is_admin flag edited in the database, only once the entry expires.
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
+def _detached_copy(user: User) -> User:
+    """Snapshot a loaded user so cached state is never shared with a live session"""
+    values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    copy = User(**values)
+    make_transient_to_detached(copy)
+    return copy
+
+class PrincipalCache:
+    """LRU cache of authenticated users keyed by token subject, with a TTL"""
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL, max_size: int = PRINCIPAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    def get(self, subject: str) -> Optional[User]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(subject)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[subject]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, subject: str, user: User):
+        if not self.enabled:
+            return
+        self._entries[subject] = (time.monotonic() + self.ttl, _detached_copy(user))
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, subject: Optional[str]):
+        if subject is not None:
+            self._entries.pop(subject, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+# Global instance
+principal_cache = PrincipalCache()
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from ..monitoring.metrics import PASSWORD_HASH_LATENCY, PASSWORD_HASH_WAIT
+
+# Changing BCRYPT_ROUNDS marks existing hashes as outdated; they are rehashed on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread").lower()
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+# Maximum number of hash/verify jobs running or waiting before new ones are rejected
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", str(PASSWORD_HASH_WORKERS * 8)))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _timed(func, *args):
+    # Runs in the worker so the bcrypt time can be told apart from time spent queued
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+class PasswordPoolSaturated(Exception):
+    pass
+
+class PasswordHashPool:
+    """Runs bcrypt work off the event loop on a bounded worker pool"""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+                 kind: str = PASSWORD_HASH_EXECUTOR):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.rejected_total = 0
+
+    def start(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                # bcrypt releases the GIL, so threads give real parallelism without pickling overhead
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self, operation: str, func, *args):
+        if self._pending >= self.max_queue:
+            self.rejected_total += 1
+            raise PasswordPoolSaturated()
+        self.start()
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            elapsed, result = await asyncio.get_running_loop().run_in_executor(self._executor, _timed, func, *args)
+        finally:
+            self._pending -= 1
+        PASSWORD_HASH_LATENCY.labels(operation).observe(elapsed)
+        PASSWORD_HASH_WAIT.labels(operation).observe(max(0.0, time.perf_counter() - started - elapsed))
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run("verify", _verify_and_update, plain_password, hashed_password)
+
+    def stats(self):
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "rejected_total": self.rejected_total,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+        }
+
+# Global instance
+password_pool = PasswordHashPool()
+
+def _saturated_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please try again shortly",
+        headers={"Retry-After": "1"}
+    )
+
+async def hash_password(password: str) -> str:
+    try:
+        return await password_pool.hash(password)
+    except PasswordPoolSaturated:
+        raise _saturated_exception()
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password, returning a replacement hash when the stored one is outdated"""
+    try:
+        return await password_pool.verify_and_update(plain_password, hashed_password)
+    except PasswordPoolSaturated:
+        raise _saturated_exception()
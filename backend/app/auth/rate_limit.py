@@ -0,0 +1,227 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+import orjson
+from jose import JWTError, jwt
+
+from ..monitoring.metrics import RATE_LIMITED
+from .security import SECRET_KEY, ALGORITHM
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+# Keys tracked at once; the least recently used are dropped beyond this
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Largest request body read to find the account name of a login or registration
+RATE_LIMIT_MAX_BODY = int(os.getenv("RATE_LIMIT_MAX_BODY", "65536"))
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0, "day": 86400.0}
+
+def parse_rate(value: str) -> Tuple[int, float]:
+    """Parse a rate such as "10/minute" into (requests, period in seconds)"""
+    count, _, period = value.partition("/")
+    return int(count), _PERIODS[period.strip()]
+
+@dataclass(frozen=True)
+class Limit:
+    name: str
+    # "ip" for the client address, "account" for the username the request acts for
+    key: str
+    requests: int
+    period: float
+
+    @classmethod
+    def from_env(cls, name: str, key: str, variable: str, default: str) -> "Limit":
+        requests, period = parse_rate(os.getenv(variable, default))
+        return cls(name, key, requests, period)
+
+# Per-route limits for the expensive endpoints: bcrypt, Pterodactyl calls and provisioning.
+# Each allows its full count in one burst, then refills evenly over the period.
+ROUTE_LIMITS: Dict[Tuple[str, str], List[Limit]] = {
+    ("POST", "/api/auth/login"): [
+        Limit.from_env("login", "ip", "RATE_LIMIT_LOGIN_PER_IP", "20/minute"),
+        Limit.from_env("login", "account", "RATE_LIMIT_LOGIN_PER_ACCOUNT", "5/minute"),
+    ],
+    ("POST", "/api/auth/register"): [
+        Limit.from_env("register", "ip", "RATE_LIMIT_REGISTER_PER_IP", "5/hour"),
+    ],
+    ("PUT", "/api/users/profile"): [
+        Limit.from_env("profile", "account", "RATE_LIMIT_PROFILE_PER_ACCOUNT", "10/minute"),
+    ],
+    ("POST", "/api/servers"): [
+        Limit.from_env("create_server", "account", "RATE_LIMIT_CREATE_SERVER_PER_ACCOUNT", "10/minute"),
+    ],
+    ("POST", "/api/servers/power"): [
+        Limit.from_env("bulk_power", "account", "RATE_LIMIT_BULK_POWER_PER_ACCOUNT", "30/minute"),
+    ],
+}
+# Applied to every request, on top of its route's limits
+DEFAULT_LIMITS: List[Limit] = [
+    Limit.from_env("default", "ip", "RATE_LIMIT_DEFAULT_PER_IP", "600/minute"),
+]
+_LIMITS_BY_ROUTE = {route: limits + DEFAULT_LIMITS for route, limits in ROUTE_LIMITS.items()}
+# Routes whose account comes from the request body rather than a bearer token
+BODY_ACCOUNT_ROUTES = {("POST", "/api/auth/login"), ("POST", "/api/auth/register")}
+
+class RateLimiter:
+    """GCRA rate limiter keeping one theoretical arrival time per (limit, key).
+
+    A key whose arrival time has passed is indistinguishable from a new one, so idle keys
+    are dropped as they are met, and the store never grows beyond max_keys.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._arrivals: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+        self.evictions = 0
+
+    def hit(self, checks: List[Tuple[Limit, str]], now: Optional[float] = None) -> Tuple[Optional[Limit], float]:
+        """Count one request against every (limit, key) pair.
+
+        Returns (None, 0) when it is allowed, otherwise the limit it exceeded and the seconds
+        until it would be allowed. A rejected request uses up none of its limits.
+        """
+        now = time.monotonic() if now is None else now
+        updates = []
+        for limit, key in checks:
+            store_key = (limit.name, limit.key, key)
+            interval = limit.period / limit.requests
+            arrival = max(self._arrivals.get(store_key, now), now) + interval
+            allowed_at = arrival - limit.period
+            if allowed_at > now:
+                self.limited += 1
+                return limit, allowed_at - now
+            updates.append((store_key, arrival))
+
+        for store_key, arrival in updates:
+            self._arrivals[store_key] = arrival
+            self._arrivals.move_to_end(store_key)
+        self._evict(now)
+        self.allowed += 1
+        return None, 0.0
+
+    def _evict(self, now: float):
+        arrivals = self._arrivals
+        # The least recently used keys are the likeliest to be idle; stop at the first live one
+        while arrivals:
+            arrival = next(iter(arrivals.values()))
+            if arrival > now and len(arrivals) <= self.max_keys:
+                break
+            if arrival > now:
+                self.evictions += 1
+            arrivals.popitem(last=False)
+
+    def clear(self):
+        self._arrivals.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._arrivals),
+            "max_keys": self.max_keys,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evictions": self.evictions,
+        }
+
+# Global instance
+rate_limiter = RateLimiter()
+
+def _token_subject(headers: Dict[bytes, bytes]) -> Optional[str]:
+    scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        # Only the signature is checked, which is cheap; the route still authenticates properly
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+def _body_username(headers: Dict[bytes, bytes], body: bytes) -> Optional[str]:
+    content_type = headers.get(b"content-type", b"").decode("latin-1")
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return parse_qs(body.decode()).get("username", [None])[0]
+        if content_type.startswith("application/json"):
+            data = orjson.loads(body)
+            username = data.get("username") if isinstance(data, dict) else None
+            return username if isinstance(username, str) else None
+    except (UnicodeDecodeError, orjson.JSONDecodeError):
+        pass
+    return None
+
+async def _buffer_body(receive, limit: int):
+    """Read up to limit bytes of the body, returning them and a receive that replays them"""
+    messages = []
+    body = b""
+    while len(body) <= limit:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+
+    async def replay():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return body, replay
+
+class RateLimitMiddleware:
+    """Rejects requests over their route's limits with 429 before the route does any work"""
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = (scope["method"], scope["path"].rstrip("/") or "/")
+        limits = _LIMITS_BY_ROUTE.get(route, DEFAULT_LIMITS)
+        headers = dict(scope["headers"])
+        # Behind a proxy this is the forwarded address, but only if FORWARDED_ALLOW_IPS lists the
+        # proxy; otherwise all clients share the proxy's address and its limits
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+
+        account = None
+        if any(limit.key == "account" for limit in limits):
+            if route in BODY_ACCOUNT_ROUTES:
+                body, receive = await _buffer_body(receive, RATE_LIMIT_MAX_BODY)
+                account = _body_username(headers, body)
+            else:
+                account = _token_subject(headers)
+
+        checks = []
+        for limit in limits:
+            if limit.key == "ip":
+                checks.append((limit, client_ip))
+            elif account is not None:
+                # Requests without an account are rejected by the route itself
+                checks.append((limit, account))
+
+        limit, retry_after = self.limiter.hit(checks)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.labels(limit.name, limit.key).inc()
+        body = orjson.dumps({"detail": "Too many requests, please try again later"})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
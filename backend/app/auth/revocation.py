@@ -0,0 +1,222 @@
+import asyncio
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from ..database.connection import AsyncSessionLocal
+from ..models.database import TokenRevocation
+from .cache import principal_cache
+
+# How often each worker reads revocations made by the others
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "5"))
+# Each sync re-reads this many seconds before the newest row it has seen, so rows that
+# committed late (after a newer row was already read) are still picked up
+REVOCATION_SYNC_OVERLAP = float(os.getenv("REVOCATION_SYNC_OVERLAP", "60"))
+# Width in seconds of one timing wheel slot; entries are pruned up to this late
+REVOCATION_WHEEL_RESOLUTION = float(os.getenv("REVOCATION_WHEEL_RESOLUTION", "10"))
+# How often expired rows are deleted from the database
+REVOCATION_PURGE_INTERVAL = float(os.getenv("REVOCATION_PURGE_INTERVAL", "3600"))
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.utcfromtimestamp(timestamp)
+
+def _to_timestamp(value: datetime) -> float:
+    return (value.replace(tzinfo=None) - datetime(1970, 1, 1)).total_seconds()
+
+class TimingWheel:
+    """Buckets keys by expiry slot, so pruning only touches the keys that actually expired"""
+
+    def __init__(self, resolution: float = REVOCATION_WHEEL_RESOLUTION):
+        self.resolution = resolution
+        self._slots: Dict[int, List[Hashable]] = defaultdict(list)
+        self._cursor: Optional[int] = None
+
+    def add(self, key: Hashable, expires_at: float):
+        slot = int(expires_at // self.resolution)
+        if self._cursor is not None and slot < self._cursor:
+            # Already expired; drop it on the next advance
+            slot = self._cursor
+        self._slots[slot].append(key)
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Return the keys of every slot that ended before now"""
+        current = int(now // self.resolution)
+        if self._cursor is None:
+            self._cursor = min(self._slots, default=current)
+        expired: List[Hashable] = []
+        while self._cursor < current:
+            expired.extend(self._slots.pop(self._cursor, ()))
+            self._cursor += 1
+        return expired
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self._slots.values())
+
+class RevocationStore:
+    """In-memory revoked tokens, persisted to the database and synced between workers.
+
+    Checks are dict lookups. Entries leave memory once every token they cover has expired.
+    """
+
+    def __init__(self, sync_interval: float = REVOCATION_SYNC_INTERVAL,
+                 sync_overlap: float = REVOCATION_SYNC_OVERLAP,
+                 resolution: float = REVOCATION_WHEEL_RESOLUTION,
+                 purge_interval: float = REVOCATION_PURGE_INTERVAL):
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        # jti -> expiry of that token
+        self._tokens: Dict[str, float] = {}
+        # subject -> (tokens issued up to this time are revoked, expiry of the last of them)
+        self._subjects: Dict[str, Tuple[float, float]] = {}
+        self._wheel = TimingWheel(resolution)
+        self._synced_until: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self.revoked = 0
+        self.rejected = 0
+        self.pruned = 0
+        self.syncs = 0
+        self.sync_failures = 0
+
+    def is_revoked(self, jti: Optional[str], subject: str, issued_at: Optional[float]) -> bool:
+        revoked = jti is not None and jti in self._tokens
+        if not revoked:
+            entry = self._subjects.get(subject)
+            # Tokens from before jti/iat were added carry no iat and count as issued at 0.
+            # iat and revoked_before are both time.time() to the microsecond.
+            revoked = entry is not None and (issued_at or 0) <= entry[0]
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    def _add_token(self, jti: str, expires_at: float):
+        if jti not in self._tokens:
+            self._tokens[jti] = expires_at
+            self._wheel.add(("token", jti), expires_at)
+
+    def _add_subject(self, subject: str, revoked_before: float, expires_at: float):
+        current = self._subjects.get(subject)
+        if current is None or current[0] < revoked_before:
+            self._subjects[subject] = (revoked_before, expires_at)
+            self._wheel.add(("subject", subject), expires_at)
+            # Reached by every worker through sync(), so none keeps serving the user it cached
+            # for this subject (e.g. under a username that was just given up)
+            principal_cache.invalidate(subject)
+
+    def _add_row(self, row: TokenRevocation):
+        expires_at = _to_timestamp(row.expires_at)
+        if row.jti is not None:
+            self._add_token(row.jti, expires_at)
+        if row.subject is not None and row.revoked_before is not None:
+            self._add_subject(row.subject, _to_timestamp(row.revoked_before), expires_at)
+
+    def prune(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        for kind, key in self._wheel.advance(now):
+            # A subject revoked again later has a newer expiry in a later slot
+            if kind == "token" and self._tokens.get(key, now) < now:
+                del self._tokens[key]
+                self.pruned += 1
+            elif kind == "subject" and key in self._subjects and self._subjects[key][1] < now:
+                del self._subjects[key]
+                self.pruned += 1
+
+    async def _persist(self, row: TokenRevocation):
+        async with AsyncSessionLocal() as db:
+            db.add(row)
+            try:
+                await db.commit()
+            except IntegrityError:
+                # The same token was revoked twice, e.g. a repeated logout
+                await db.rollback()
+
+    async def revoke_token(self, jti: str, expires_at: float):
+        """Revoke one token until it expires"""
+        self._add_token(jti, expires_at)
+        self.revoked += 1
+        await self._persist(TokenRevocation(jti=jti, expires_at=_to_datetime(expires_at)))
+
+    async def revoke_subject(self, subject: str, expires_at: float):
+        """Revoke every token issued to a subject so far; expires_at is when the last of them expires"""
+        revoked_before = time.time()
+        self._add_subject(subject, revoked_before, expires_at)
+        self.revoked += 1
+        await self._persist(TokenRevocation(
+            subject=subject,
+            revoked_before=_to_datetime(revoked_before),
+            expires_at=_to_datetime(expires_at)
+        ))
+
+    async def sync(self):
+        """Load revocations made since the last sync, by this worker or any other"""
+        query = select(TokenRevocation).where(TokenRevocation.expires_at > _to_datetime(time.time()))
+        if self._synced_until is not None:
+            query = query.where(TokenRevocation.created_at >= self._synced_until - self.sync_overlap)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.scalars(query)).all()
+        for row in rows:
+            self._add_row(row)
+            if row.created_at is not None and (self._synced_until is None or row.created_at > self._synced_until):
+                self._synced_until = row.created_at
+        self.prune()
+        self.syncs += 1
+
+    async def purge_expired(self) -> int:
+        """Delete rows whose tokens have all expired"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(TokenRevocation).where(TokenRevocation.expires_at <= _to_datetime(time.time()))
+            )
+            await db.commit()
+        return result.rowcount
+
+    async def _run(self):
+        last_purge = time.monotonic()
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+                if time.monotonic() - last_purge >= self.purge_interval:
+                    last_purge = time.monotonic()
+                    await self.purge_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.sync_failures += 1
+                print(f"Error syncing token revocations: {e}")
+
+    async def start(self):
+        # Load what was revoked before this worker started, then follow other workers
+        await self.purge_expired()
+        await self.sync()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "tokens": len(self._tokens),
+            "subjects": len(self._subjects),
+            "wheel_entries": len(self._wheel),
+            "revoked": self.revoked,
+            "rejected": self.rejected,
+            "pruned": self.pruned,
+            "syncs": self.syncs,
+            "sync_failures": self.sync_failures,
+        }
+
+# Global instance
+revocation_store = RevocationStore()
@@ -1,24 +1,25 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
-from dotenv import load_dotenv
+import time
+import uuid
 
 from ..database.connection import get_db
 from ..models.database import User
 from ..models.schemas import TokenData
-
-load_dotenv()
+from .passwords import pwd_context
+from .cache import principal_cache
+from .revocation import revocation_store
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-super-secret-key-change-this-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 def verify_password(plain_password, hashed_password):
@@ -29,11 +30,16 @@ def get_password_hash(password):
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
+    issued_at = time.time()
+    now = datetime.utcfromtimestamp(issued_at)
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+        expire = now + timedelta(minutes=15)
+    # jti identifies the token for logout; iat lets all of a user's tokens be revoked at once.
+    # iat keeps its fraction of a second (NumericDate allows it) so a token issued right after a
+    # revocation, in the same second, isn't caught by it.
+    to_encode.update({"exp": expire, "iat": issued_at, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -43,12 +49,17 @@ def verify_token(token: str, credentials_exception):
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(
+            username=username,
+            jti=payload.get("jti"),
+            issued_at=payload.get("iat"),
+            expires_at=payload.get("exp")
+        )
     except JWTError:
         raise credentials_exception
     return token_data
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def authenticate_token(token: str, db: AsyncSession) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -56,11 +67,36 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     )
     
     token_data = verify_token(token, credentials_exception)
-    user = db.query(User).filter(User.username == token_data.username).first()
+    # In-memory check, so revoked tokens are turned away without touching the database
+    if revocation_store.is_revoked(token_data.jti, token_data.username, token_data.issued_at):
+        raise credentials_exception
+    cached_user = principal_cache.get(token_data.username)
+    if cached_user is not None:
+        # Attach a per-request copy to this session without querying the database
+        return await db.merge(cached_user, load=False)
+    
+    user = await db.scalar(select(User).where(User.username == token_data.username))
     if user is None:
         raise credentials_exception
+    principal_cache.set(token_data.username, user)
     return user
 
+async def revoke_token(token: str):
+    """Revoke a single token that was already authenticated, e.g. on logout"""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    # Tokens issued before jti was added can't be revoked one by one; they expire soon anyway
+    if payload.get("jti"):
+        await revocation_store.revoke_token(payload["jti"], payload["exp"])
+
+async def revoke_user_tokens(username: str):
+    """Revoke every token issued to a user so far, e.g. when the account is deactivated"""
+    # Login tokens are the longest lived, so none of the revoked ones outlasts this
+    expires_at = time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    await revocation_store.revoke_subject(username, expires_at)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    return await authenticate_token(token, db)
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+CONFIG_PATH = os.getenv("CONFIG_PATH", "config.json")
+# Minimum number of seconds between mtime checks of the config file
+CONFIG_RELOAD_INTERVAL = float(os.getenv("CONFIG_RELOAD_INTERVAL", "2"))
+
+class ConfigError(ValueError):
+    pass
+
+def _require(section: Dict[str, Any], name: str, key: str, expected_type):
+    if key not in section:
+        raise ConfigError(f"{name}.{key} is missing")
+    value = section[key]
+    # bool is a subclass of int, so reject it explicitly for numeric fields
+    if not isinstance(value, expected_type) or (expected_type is int and isinstance(value, bool)):
+        raise ConfigError(f"{name}.{key} must be of type {expected_type.__name__}")
+    return value
+
+@dataclass(frozen=True)
+class ServerConfig:
+    default_memory: int
+    default_disk: int
+    default_cpu: int
+    default_databases: int
+    default_allocations: int
+    default_backups: int
+    default_egg: int
+    default_nest: int
+    startup_command: str
+    image: str
+    environment: Mapping[str, str]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ServerConfig":
+        name = "server_config"
+        return cls(
+            default_memory=_require(data, name, "default_memory", int),
+            default_disk=_require(data, name, "default_disk", int),
+            default_cpu=_require(data, name, "default_cpu", int),
+            default_databases=_require(data, name, "default_databases", int),
+            default_allocations=_require(data, name, "default_allocations", int),
+            default_backups=_require(data, name, "default_backups", int),
+            default_egg=_require(data, name, "default_egg", int),
+            default_nest=_require(data, name, "default_nest", int),
+            startup_command=_require(data, name, "startup_command", str),
+            image=_require(data, name, "image", str),
+            environment=MappingProxyType(dict(_require(data, name, "environment", dict)))
+        )
+
+@dataclass(frozen=True)
+class AppConfig:
+    app_name: str
+    app_description: str
+    default_node: int
+    max_servers_per_user: int
+    registration_enabled: bool
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AppConfig":
+        name = "app_config"
+        return cls(
+            app_name=_require(data, name, "app_name", str),
+            app_description=_require(data, name, "app_description", str),
+            default_node=_require(data, name, "default_node", int),
+            max_servers_per_user=_require(data, name, "max_servers_per_user", int),
+            registration_enabled=_require(data, name, "registration_enabled", bool)
+        )
+
+@dataclass(frozen=True)
+class Config:
+    server: ServerConfig
+    app: AppConfig
+    mtime: float
+
+def parse_config(data: Dict[str, Any], mtime: float = 0.0) -> Config:
+    """Validate a raw config.json document into typed, immutable objects"""
+    if not isinstance(data.get("server_config"), dict):
+        raise ConfigError("server_config section is missing")
+    if not isinstance(data.get("app_config"), dict):
+        raise ConfigError("app_config section is missing")
+    return Config(
+        server=ServerConfig.from_dict(data["server_config"]),
+        app=AppConfig.from_dict(data["app_config"]),
+        mtime=mtime
+    )
+
+class ConfigService:
+    """Serves config.json from memory and reloads it when the file changes"""
+
+    def __init__(self, path: str = CONFIG_PATH, reload_interval: float = CONFIG_RELOAD_INTERVAL):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._config: Optional[Config] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _read(self) -> Config:
+        mtime = os.stat(self.path).st_mtime
+        with open(self.path, "r") as f:
+            data = json.load(f)
+        return parse_config(data, mtime)
+
+    def load(self) -> Config:
+        """Load and validate the config file, raising on any error"""
+        config = self._read()
+        with self._lock:
+            self._config = config
+            self._last_check = time.monotonic()
+        return config
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        if not self._lock.acquire(blocking=False):
+            # Another caller is already checking; serve the current config
+            return
+        try:
+            self._last_check = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError as e:
+                print(f"Error checking config file: {e}")
+                return
+            if mtime == self._config.mtime:
+                return
+            try:
+                # Swap in the new config only once it has fully validated
+                self._config = self._read()
+            except (OSError, ValueError) as e:
+                print(f"Error reloading config, keeping previous version: {e}")
+        finally:
+            self._lock.release()
+
+    def get(self) -> Config:
+        if self._config is None:
+            return self.load()
+        self._maybe_reload()
+        return self._config
+
+# Global instance
+config_service = ConfigService()
+
+def get_config() -> Config:
+    return config_service.get()
@@ -1,13 +1,29 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from typing import Optional
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./mchostpanel.db")
 
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (aiosqlite/asyncpg)"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql+psycopg2:"):
+        return url.replace("postgresql+psycopg2:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgresql:"):
+        return url.replace("postgresql:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgres:"):
+        return url.replace("postgres:", "postgresql+asyncpg:", 1)
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", get_async_database_url(DATABASE_URL))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+# Sync engine, used for schema management outside the request path
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 else:
@@ -15,11 +31,51 @@ else:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# SQLite ignores foreign keys (and their ON DELETE CASCADE) unless asked per connection
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+if DATABASE_URL.startswith("sqlite"):
+    event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+
+# Async engine, used by every request handler so queries never block the event loop.
+# It is created by init_async_engine() from the app lifespan, so importing the app (e.g. in a
+# preloading prefork master) never builds a connection pool that forked workers would share.
+async_engine: Optional[AsyncEngine] = None
+
+# expire_on_commit=False so returned ORM objects can be serialized after commit
+AsyncSessionLocal = async_sessionmaker(expire_on_commit=False, autoflush=False)
+
+def init_async_engine() -> AsyncEngine:
+    """Create the async engine and bind the session factory to it"""
+    global async_engine
+    if async_engine is None:
+        if ASYNC_DATABASE_URL.startswith("sqlite"):
+            async_engine = create_async_engine(ASYNC_DATABASE_URL)
+            event.listen(async_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+        else:
+            async_engine = create_async_engine(
+                ASYNC_DATABASE_URL,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_pre_ping=True
+            )
+        AsyncSessionLocal.configure(bind=async_engine)
+    return async_engine
+
+def get_async_engine() -> Optional[AsyncEngine]:
+    return async_engine
+
+async def dispose_async_engine():
+    global async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
@@ -0,0 +1,17 @@
+from pathlib import Path
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+def get_alembic_config(url: Optional[str] = None) -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    if url:
+        config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    return config
+
+def upgrade_database(url: Optional[str] = None, revision: str = "head"):
+    """Apply pending migrations; the programmatic equivalent of `alembic upgrade head`"""
+    command.upgrade(get_alembic_config(url), revision)
@@ -0,0 +1,57 @@
+import base64
+import json
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def paginate(
+    db: AsyncSession,
+    query,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    include_total: bool = True
+) -> Tuple[List[Any], Optional[str], Optional[int]]:
+    """Keyset-paginate ``query`` on ``id_column``, returning (rows, next_cursor, total).
+
+    Ordering by the primary key keeps pages stable while rows are inserted, and
+    seeking past the last ID avoids the OFFSET scan cost on deep pages. A query
+    for one entity yields objects; a query for several columns yields rows,
+    which must include ``id``.
+    """
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+    page_query = query.order_by(id_column)
+    if cursor:
+        page_query = page_query.where(id_column > decode_cursor(cursor))
+    # Fetch one extra row to learn whether another page exists
+    result = await db.execute(page_query.limit(limit + 1))
+    rows = result.scalars().all() if len(query.column_descriptions) == 1 else result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return rows, next_cursor, total
+
+def set_pagination_headers(response: Response, next_cursor: Optional[str], total: Optional[int]):
+    # Headers keep the response body a plain list, so existing clients are unaffected
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
@@ -0,0 +1,23 @@
+from typing import Any, Dict, List, Sequence
+from sqlalchemy import select
+from pydantic import BaseModel
+
+class Projection:
+    """Selects only the columns a response schema exposes and turns the rows into plain dicts.
+
+    List endpoints use this to skip building ORM instances and validating every row through
+    the schema; the dicts go straight to the JSON encoder.
+    """
+
+    def __init__(self, model, schema: type[BaseModel]):
+        self.fields = list(schema.model_fields)
+        self.columns = [getattr(model, name) for name in self.fields]
+
+    def select(self, *extra):
+        """SELECT of the schema's columns, followed by any extra columns the caller needs"""
+        return select(*self.columns, *extra)
+
+    def dicts(self, rows: Sequence[Any]) -> List[Dict[str, Any]]:
+        # zip stops at the schema's fields, which drops the extra columns
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in rows]
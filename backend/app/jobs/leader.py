@@ -0,0 +1,143 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import update, or_
+from sqlalchemy.exc import IntegrityError
+
+from ..database.connection import AsyncSessionLocal
+from ..models.database import BackgroundLease
+
+# How long the leader may go without renewing before another process takes over
+LEADER_LEASE = float(os.getenv("LEADER_LEASE", "30"))
+LEADER_RENEW_INTERVAL = float(os.getenv("LEADER_RENEW_INTERVAL", "10"))
+
+class BackgroundLeader:
+    """Elects one process among the workers to run background work, through a lease row.
+
+    The holder renews the lease every renew_interval. Other processes try to take it on the
+    same schedule and succeed once it has expired, e.g. after the holder was killed.
+    """
+
+    def __init__(self, name: str = "background", lease: float = LEADER_LEASE,
+                 renew_interval: float = LEADER_RENEW_INTERVAL):
+        self.name = name
+        self.lease = lease
+        self.renew_interval = renew_interval
+        # Set in start(): a preloading prefork master imports this before forking the workers
+        self.holder: Optional[str] = None
+        self.is_leader = False
+        self._valid_until = 0.0
+        self._on_acquire: Optional[Callable[[], Awaitable[None]]] = None
+        self._on_release: Optional[Callable[[], Awaitable[None]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.acquired = 0
+        self.lost = 0
+        self.failures = 0
+
+    async def try_acquire(self) -> bool:
+        """Take or renew the lease; True while this process holds it"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(BackgroundLease)
+                .where(
+                    BackgroundLease.name == self.name,
+                    or_(BackgroundLease.holder == self.holder, BackgroundLease.expires_at < now)
+                )
+                .values(holder=self.holder, expires_at=expires_at)
+            )
+            await db.commit()
+            if result.rowcount == 1:
+                return True
+            db.add(BackgroundLease(name=self.name, holder=self.holder, expires_at=expires_at))
+            try:
+                await db.commit()
+                return True
+            except IntegrityError:
+                # Held by another process
+                await db.rollback()
+                return False
+
+    async def release(self):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(BackgroundLease)
+                .where(BackgroundLease.name == self.name, BackgroundLease.holder == self.holder)
+                .values(expires_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    async def _step(self):
+        started = time.monotonic()
+        try:
+            held = await self.try_acquire()
+        except Exception as e:
+            self.failures += 1
+            print(f"Error renewing the background lease: {e}")
+            # Keep going only while the lease we last wrote is still ours
+            held = self.is_leader and started < self._valid_until
+        if held:
+            self._valid_until = started + self.lease
+        if held and not self.is_leader:
+            self.is_leader = True
+            self.acquired += 1
+            await self._on_acquire()
+        elif not held and self.is_leader:
+            self.is_leader = False
+            self.lost += 1
+            await self._on_release()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            try:
+                await self._step()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error starting or stopping background work: {e}")
+
+    async def start(self, on_acquire: Callable[[], Awaitable[None]], on_release: Callable[[], Awaitable[None]]):
+        """Run on_acquire whenever this process becomes leader and on_release when it stops being one"""
+        self._on_acquire = on_acquire
+        self._on_release = on_release
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # The first worker up starts the background work straight away
+        await self._step()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            self.is_leader = False
+            await self._on_release()
+            try:
+                # Let another worker take over without waiting for the lease to expire
+                await self.release()
+            except Exception as e:
+                print(f"Error releasing the background lease: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "holder": self.holder,
+            "is_leader": self.is_leader,
+            "running": self._task is not None,
+            "acquired": self.acquired,
+            "lost": self.lost,
+            "failures": self.failures,
+        }
+
+# Global instance
+background_leader = BackgroundLeader()
@@ -0,0 +1,364 @@
+import argparse
+import asyncio
+import os
+import secrets
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+from sqlalchemy import select, update, or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..database.connection import AsyncSessionLocal, init_async_engine, dispose_async_engine
+from ..config.loader import config_service
+from ..models.database import User, Server, ProvisioningJob, PanelImport
+from ..pterodactyl.client import pterodactyl_client
+from ..pterodactyl.reconciler import map_upstream_status
+from ..auth.passwords import password_pool
+from .provisioning import ACTIVE_STATUSES
+
+IMPORT_PAGE_SIZE = int(os.getenv("IMPORT_PAGE_SIZE", "100"))
+# Upstream objects written per transaction; progress is saved with each one
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# How long a process owns an import before another may resume it; renewed with every batch
+IMPORT_LEASE = float(os.getenv("IMPORT_LEASE", "300"))
+
+# Import states: running -> completed | failed | cancelled. Running and failed imports resume.
+RESUMABLE_STATUSES = ("running", "failed")
+# Users are imported first so servers can be given a local owner
+PHASES = ("users", "servers")
+
+class ImportInProgress(Exception):
+    pass
+
+class ImportCancelled(Exception):
+    pass
+
+def _insert(db, model):
+    """INSERT ... ON CONFLICT DO NOTHING for the session's backend.
+
+    Executed with a list of rows, SQLAlchemy sends them as a few multi-row statements it
+    compiles once, and RETURNING yields only the rows that were actually inserted.
+    """
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(model).on_conflict_do_nothing()
+
+class PanelImporter:
+    """Copies the panel's users and servers into local rows, a batch of pages per transaction.
+
+    Each batch commits its rows together with the next page to fetch, so an import stopped
+    at any point resumes from the last committed batch without duplicating rows.
+    """
+
+    def __init__(self, page_size: int = IMPORT_PAGE_SIZE, batch_size: int = IMPORT_BATCH_SIZE,
+                 lease: float = IMPORT_LEASE):
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self.lease = timedelta(seconds=lease)
+        self._tasks: Dict[int, asyncio.Task] = {}
+        # Imported users get the hash of a random secret, so nobody can log in as them
+        # until a password is set for them here
+        self._placeholder_hash: Optional[str] = None
+        self.batches = 0
+        self.completed = 0
+        self.failed = 0
+        self.last_batch_duration: Optional[float] = None
+
+    async def create_or_resume(self, restart: bool = False) -> PanelImport:
+        """Return the unfinished import, or start a new one if there is none or restart is set.
+
+        Raises ImportInProgress when the unfinished import is leased by a running process.
+        """
+        async with AsyncSessionLocal() as db:
+            current = await db.scalar(
+                select(PanelImport)
+                .where(PanelImport.status.in_(RESUMABLE_STATUSES))
+                .order_by(PanelImport.id.desc())
+                .limit(1)
+            )
+            if current is not None and current.claimed_until is not None \
+                    and current.claimed_until > datetime.utcnow():
+                raise ImportInProgress()
+            if current is not None and not restart:
+                return current
+            if current is not None:
+                current.status = "cancelled"
+                current.finished_at = datetime.utcnow()
+            panel_import = PanelImport(status="running", phase=PHASES[0], next_page=1)
+            db.add(panel_import)
+            await db.commit()
+            await db.refresh(panel_import)
+            return panel_import
+
+    async def _claim(self, db, import_id: int) -> bool:
+        now = datetime.utcnow()
+        claim = await db.execute(
+            update(PanelImport)
+            .where(
+                PanelImport.id == import_id,
+                PanelImport.status.in_(RESUMABLE_STATUSES),
+                or_(PanelImport.claimed_until.is_(None), PanelImport.claimed_until < now)
+            )
+            .values(status="running", error=None, claimed_until=now + self.lease)
+        )
+        await db.commit()
+        return claim.rowcount == 1
+
+    async def run(self, import_id: int, progress: Optional[Callable[[PanelImport], None]] = None) -> bool:
+        """Run or resume an import to completion; False if another process holds or took it"""
+        async with AsyncSessionLocal() as db:
+            if not await self._claim(db, import_id):
+                return False
+        if self._placeholder_hash is None:
+            self._placeholder_hash = await password_pool.hash(secrets.token_urlsafe(32))
+
+        try:
+            async with AsyncSessionLocal() as db:
+                panel_import = await db.get(PanelImport, import_id)
+            while panel_import.phase in PHASES:
+                panel_import = await self._run_phase(panel_import, progress)
+        except asyncio.CancelledError:
+            # Let the import be resumed straight away rather than after the lease runs out
+            await self._finish(import_id, claimed_until=None)
+            raise
+        except ImportCancelled:
+            return False
+        except Exception as e:
+            print(f"Error importing from the Pterodactyl panel: {e}")
+            self.failed += 1
+            await self._finish(import_id, status="failed", error=str(e), claimed_until=None)
+            raise
+        self.completed += 1
+        return True
+
+    async def _finish(self, import_id: int, **values):
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(PanelImport).where(PanelImport.id == import_id).values(**values))
+            await db.commit()
+
+    async def _run_phase(self, panel_import: PanelImport,
+                         progress: Optional[Callable[[PanelImport], None]]) -> PanelImport:
+        if panel_import.phase == "users":
+            pages, write = pterodactyl_client.iter_user_pages, self._write_users
+        else:
+            pages, write = pterodactyl_client.iter_server_pages, self._write_servers
+
+        buffer: List[Dict[str, Any]] = []
+        async for page, total_pages, items in pages(self.page_size, panel_import.next_page):
+            buffer.extend(items)
+            last = page >= total_pages
+            if len(buffer) < self.batch_size and not last:
+                continue
+            panel_import = await self._write_batch(panel_import.id, write, buffer, page, total_pages, last)
+            buffer = []
+            if progress is not None:
+                progress(panel_import)
+        return panel_import
+
+    async def _write_batch(self, import_id: int, write, items: List[Dict[str, Any]],
+                           page: int, total_pages: int, last: bool) -> PanelImport:
+        """Write one batch and the progress past it in a single transaction"""
+        started = time.monotonic()
+        async with AsyncSessionLocal() as db:
+            panel_import = await db.get(PanelImport, import_id)
+            if panel_import.status != "running":
+                # Restarted by someone else after our lease ran out
+                raise ImportCancelled()
+            await write(db, panel_import, items)
+            if last:
+                phase = PHASES.index(panel_import.phase) + 1
+                panel_import.phase = PHASES[phase] if phase < len(PHASES) else "done"
+                panel_import.next_page = 1
+                panel_import.total_pages = None
+            else:
+                panel_import.next_page = page + 1
+                panel_import.total_pages = total_pages
+            if panel_import.phase == "done":
+                panel_import.status = "completed"
+                panel_import.finished_at = datetime.utcnow()
+                panel_import.claimed_until = None
+            else:
+                panel_import.claimed_until = datetime.utcnow() + self.lease
+            await db.commit()
+        self.batches += 1
+        self.last_batch_duration = time.monotonic() - started
+        return panel_import
+
+    async def _write_users(self, db, panel_import: PanelImport, items: List[Dict[str, Any]]):
+        panel_import.users_seen += len(items)
+        upstream = {item["id"]: item for item in items}
+        imported = set((await db.scalars(
+            select(User.pterodactyl_id).where(User.pterodactyl_id.in_(upstream))
+        )).all())
+        pending = [item for pid, item in upstream.items() if pid not in imported]
+        if not pending:
+            return
+
+        usernames = [item["username"] for item in pending]
+        emails = [item["email"] for item in pending]
+        local = (await db.execute(
+            select(User.id, User.username, User.email, User.pterodactyl_id)
+            .where(or_(User.username.in_(usernames), User.email.in_(emails)))
+        )).all()
+        by_username = {row.username: row for row in local}
+        taken_emails = {row.email for row in local}
+
+        links, rows = [], []
+        for item in pending:
+            match = by_username.get(item["username"])
+            if match is not None and match.email == item["email"] and match.pterodactyl_id is None:
+                # Someone registered here without an upstream account; attach the panel's
+                links.append({"id": match.id, "pterodactyl_id": item["id"]})
+            elif match is not None or item["email"] in taken_emails:
+                panel_import.users_skipped += 1
+            else:
+                rows.append({
+                    "username": item["username"],
+                    "email": item["email"],
+                    "hashed_password": self._placeholder_hash,
+                    "pterodactyl_id": item["id"],
+                })
+
+        if links:
+            # One executemany UPDATE by primary key for the whole batch
+            await db.execute(update(User), links)
+            panel_import.users_linked += len(links)
+        if rows:
+            # Registrations that land mid-import conflict and are skipped rather than failing the batch
+            created = len((await db.execute(_insert(db, User).returning(User.id), rows)).all())
+            panel_import.users_created += created
+            panel_import.users_skipped += len(rows) - created
+
+    async def _write_servers(self, db, panel_import: PanelImport, items: List[Dict[str, Any]]):
+        panel_import.servers_seen += len(items)
+        upstream = {item["id"]: item for item in items}
+        existing = (await db.execute(
+            select(Server.id, Server.pterodactyl_id, Server.status, Server.pterodactyl_identifier)
+            .where(Server.pterodactyl_id.in_(upstream))
+        )).all()
+
+        changes, seen = [], set()
+        for server_id, pterodactyl_id, current, identifier in existing:
+            seen.add(pterodactyl_id)
+            item = upstream[pterodactyl_id]
+            status = map_upstream_status(item)
+            if status != current or identifier != item.get("identifier"):
+                changes.append({"id": server_id, "status": status, "pterodactyl_identifier": item.get("identifier")})
+        if changes:
+            await db.execute(update(Server), changes)
+            panel_import.servers_updated += len(changes)
+
+        pending = [item for pid, item in upstream.items() if pid not in seen]
+        if not pending:
+            return
+        owners = dict((await db.execute(
+            select(User.pterodactyl_id, User.id).where(User.pterodactyl_id.in_({item["user"] for item in pending}))
+        )).all())
+        # Servers still being provisioned get their local row from the provisioning job
+        external_ids: Set[str] = {item["external_id"] for item in pending if item.get("external_id")}
+        provisioning = set((await db.scalars(
+            select(ProvisioningJob.id)
+            .where(ProvisioningJob.id.in_(external_ids), ProvisioningJob.status.in_(ACTIVE_STATUSES))
+        )).all()) if external_ids else set()
+
+        rows = []
+        for item in pending:
+            owner = owners.get(item["user"])
+            if owner is None or item.get("external_id") in provisioning:
+                panel_import.servers_skipped += 1
+                continue
+            rows.append({
+                "user_id": owner,
+                "pterodactyl_id": item["id"],
+                "pterodactyl_identifier": item.get("identifier"),
+                "name": item["name"],
+                "description": item.get("description"),
+                "status": map_upstream_status(item),
+            })
+        if rows:
+            # A local server with the same owner and name is left alone
+            created = len((await db.execute(_insert(db, Server).returning(Server.id), rows)).all())
+            panel_import.servers_created += created
+            panel_import.servers_skipped += len(rows) - created
+
+    def submit(self, import_id: int):
+        """Run an import in the background of this process"""
+        task = self._tasks.get(import_id)
+        if task is not None and not task.done():
+            return
+
+        async def run():
+            try:
+                await self.run(import_id)
+            except Exception:
+                # Already recorded on the import row
+                pass
+
+        task = asyncio.create_task(run())
+        self._tasks[import_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(import_id, None))
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": sorted(self._tasks),
+            "page_size": self.page_size,
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "completed": self.completed,
+            "failed": self.failed,
+            "last_batch_duration": self.last_batch_duration,
+        }
+
+# Global instance
+panel_importer = PanelImporter()
+
+def _describe(panel_import: PanelImport) -> str:
+    if panel_import.phase == "done":
+        where = "done"
+    elif panel_import.total_pages:
+        where = f"{panel_import.phase} page {panel_import.next_page - 1}/{panel_import.total_pages}"
+    else:
+        where = f"{panel_import.phase} starting"
+    return (
+        f"import {panel_import.id}: {where}; "
+        f"users {panel_import.users_seen} seen, {panel_import.users_created} created, "
+        f"{panel_import.users_linked} linked, {panel_import.users_skipped} skipped; "
+        f"servers {panel_import.servers_seen} seen, {panel_import.servers_created} created, "
+        f"{panel_import.servers_updated} updated, {panel_import.servers_skipped} skipped"
+    )
+
+async def _main(restart: bool) -> int:
+    config_service.load()
+    init_async_engine()
+    await pterodactyl_client.start()
+    password_pool.start()
+    try:
+        panel_import = await panel_importer.create_or_resume(restart)
+        print(f"{'Resuming' if panel_import.users_seen or panel_import.servers_seen else 'Starting'} "
+              f"{_describe(panel_import)}")
+        if not await panel_importer.run(panel_import.id, progress=lambda row: print(_describe(row))):
+            print(f"Import {panel_import.id} is being run by another process")
+            return 1
+        return 0
+    except ImportInProgress:
+        print("An import is already running in another process")
+        return 1
+    except Exception:
+        # run() has printed the error and marked the import failed; run again to resume it
+        return 1
+    finally:
+        password_pool.shutdown()
+        await pterodactyl_client.close()
+        await dispose_async_engine()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import users and servers from the Pterodactyl panel")
+    parser.add_argument("--restart", action="store_true",
+                        help="abandon an unfinished import and start again from the first page")
+    raise SystemExit(asyncio.run(_main(parser.parse_args().restart)))
@@ -0,0 +1,355 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set
+from sqlalchemy import select, update, insert, func, exists, literal, or_, String, Integer
+from sqlalchemy.exc import IntegrityError
+
+from ..database.connection import AsyncSessionLocal
+from ..models.database import User, Server, ProvisioningJob
+from ..pterodactyl.client import pterodactyl_client
+from ..pterodactyl.reconciler import map_upstream_status
+from ..pterodactyl.placement import node_placement
+from ..config.loader import get_config
+
+PROVISION_WORKERS = int(os.getenv("PROVISION_WORKERS", "4"))
+PROVISION_QUEUE_SIZE = int(os.getenv("PROVISION_QUEUE_SIZE", "1000"))
+PROVISION_MAX_ATTEMPTS = int(os.getenv("PROVISION_MAX_ATTEMPTS", "5"))
+PROVISION_RETRY_DELAY = float(os.getenv("PROVISION_RETRY_DELAY", "2"))
+PROVISION_RETRY_MAX_DELAY = float(os.getenv("PROVISION_RETRY_MAX_DELAY", "60"))
+PROVISION_POLL_INTERVAL = float(os.getenv("PROVISION_POLL_INTERVAL", "5"))
+PROVISION_INSTALL_TIMEOUT = float(os.getenv("PROVISION_INSTALL_TIMEOUT", "1800"))
+# How long a worker owns a job step before another process may pick it up
+PROVISION_LEASE = float(os.getenv("PROVISION_LEASE", "120"))
+# How often the queue looks for jobs created by other processes or left by a previous run
+PROVISION_SCAN_INTERVAL = float(os.getenv("PROVISION_SCAN_INTERVAL", "2"))
+
+# Job states, in order: queued -> creating -> installing -> completed | failed
+ACTIVE_STATUSES = ("queued", "creating", "installing")
+# Jobs in these states have no Server row yet but still count towards quota and names
+PENDING_STATUSES = ("queued", "creating")
+
+async def reserve_job(
+    db,
+    job_id: str,
+    user_id: int,
+    name: str,
+    description: Optional[str],
+    idempotency_key: Optional[str],
+    max_servers: int
+) -> bool:
+    """Insert a queued job only if the user is under quota and the name is free, atomically"""
+    if db.bind.dialect.name != "sqlite":
+        # Serialise reservations per user; the insert below then sees every committed job.
+        # SQLite needs no lock since it only allows one writer and the insert is one statement.
+        await db.execute(select(User.id).where(User.id == user_id).with_for_update())
+
+    server_count = select(func.count()).select_from(Server).where(Server.user_id == user_id).scalar_subquery()
+    pending_count = (
+        select(func.count())
+        .select_from(ProvisioningJob)
+        .where(ProvisioningJob.user_id == user_id, ProvisioningJob.status.in_(PENDING_STATUSES))
+        .scalar_subquery()
+    )
+    name_taken = exists().where(Server.user_id == user_id, Server.name == name)
+    name_pending = exists().where(
+        ProvisioningJob.user_id == user_id,
+        ProvisioningJob.name == name,
+        ProvisioningJob.status.in_(PENDING_STATUSES)
+    )
+    row = select(
+        literal(job_id, String),
+        literal(user_id, Integer),
+        literal(idempotency_key, String),
+        literal(name, String),
+        literal(description, String),
+        literal("queued", String),
+        literal(0, Integer),
+    ).where(server_count + pending_count < max_servers, ~name_taken, ~name_pending)
+
+    result = await db.execute(
+        insert(ProvisioningJob).from_select(
+            ["id", "user_id", "idempotency_key", "name", "description", "status", "attempts"],
+            row
+        )
+    )
+    return result.rowcount == 1
+
+def _utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class ProvisioningQueue:
+    """Bounded worker pool that drives persisted provisioning jobs to completion.
+
+    Runs in one process at a time (see jobs/leader.py). Jobs created by other processes are
+    found by a periodic scan of the jobs table.
+    """
+
+    def __init__(self, workers: int = PROVISION_WORKERS, max_queue: int = PROVISION_QUEUE_SIZE,
+                 scan_interval: float = PROVISION_SCAN_INTERVAL):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.scan_interval = scan_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._timers: Set[asyncio.Task] = set()
+        self._scanner: Optional[asyncio.Task] = None
+        # Jobs queued or waiting for their next step in this process
+        self._tracked: Set[str] = set()
+        self.completed = 0
+        self.failed = 0
+
+    async def start(self):
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        # The first scan picks up jobs left unfinished by a previous run
+        await self.scan()
+        self._scanner = asyncio.create_task(self._scan_loop())
+
+    async def stop(self):
+        tasks = self._workers + list(self._timers)
+        if self._scanner is not None:
+            tasks.append(self._scanner)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._timers.clear()
+        self._scanner = None
+        self._tracked.clear()
+        self._queue = None
+
+    async def scan(self):
+        """Queue active jobs that no process is working on, as far as the queue has room"""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            job_ids = (await db.scalars(
+                select(ProvisioningJob.id)
+                .where(
+                    ProvisioningJob.status.in_(ACTIVE_STATUSES),
+                    or_(ProvisioningJob.claimed_until.is_(None), ProvisioningJob.claimed_until < now)
+                )
+                .order_by(ProvisioningJob.created_at)
+            )).all()
+        for job_id in job_ids:
+            if job_id in self._tracked:
+                continue
+            if self._queue.full():
+                # The rest stay in the table for a later scan
+                break
+            self._tracked.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _scan_loop(self):
+        while True:
+            await asyncio.sleep(self.scan_interval)
+            try:
+                await self.scan()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error scanning for provisioning jobs: {e}")
+
+    def is_full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    def submit(self, job_id: str):
+        if self._queue is None:
+            # Not running in this process; the process that runs the queue finds it by scanning
+            return
+        if job_id in self._tracked:
+            return
+        self._tracked.add(job_id)
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            self._schedule(job_id, 0)
+
+    def _schedule(self, job_id: str, delay: float):
+        async def later():
+            await asyncio.sleep(delay)
+            await self._queue.put(job_id)
+
+        task = asyncio.create_task(later())
+        self._timers.add(task)
+        task.add_done_callback(self._timers.discard)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                delay = await self._process(job_id)
+            except Exception as e:
+                print(f"Error processing provisioning job {job_id}: {e}")
+                delay = PROVISION_RETRY_DELAY
+            finally:
+                self._queue.task_done()
+            if delay is not None:
+                self._schedule(job_id, delay)
+            else:
+                self._tracked.discard(job_id)
+
+    async def _process(self, job_id: str) -> Optional[float]:
+        """Advance a job by one step, returning the delay before its next step (None when done)"""
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            # Lease the job so another worker process can't run the same step concurrently
+            claim = await db.execute(
+                update(ProvisioningJob)
+                .where(
+                    ProvisioningJob.id == job_id,
+                    ProvisioningJob.status.in_(ACTIVE_STATUSES),
+                    or_(ProvisioningJob.claimed_until.is_(None), ProvisioningJob.claimed_until < now)
+                )
+                .values(claimed_until=now + timedelta(seconds=PROVISION_LEASE))
+            )
+            await db.commit()
+            if claim.rowcount != 1:
+                job = await db.get(ProvisioningJob, job_id)
+                if job is None or job.status not in ACTIVE_STATUSES:
+                    return None
+                if job.claimed_until is None:
+                    return PROVISION_RETRY_DELAY
+                # Another process holds the step; check again once its lease runs out
+                return max(PROVISION_RETRY_DELAY, (job.claimed_until - now).total_seconds())
+
+            job = await db.get(ProvisioningJob, job_id)
+            try:
+                delay = await self._advance(db, job)
+            except IntegrityError:
+                # The server row clashes with one created meanwhile (same owner and name);
+                # retrying would clash again
+                await db.rollback()
+                await db.execute(
+                    update(ProvisioningJob)
+                    .where(ProvisioningJob.id == job_id)
+                    .values(status="failed", error="A server with this name already exists", claimed_until=None)
+                )
+                await db.commit()
+                self.failed += 1
+                return None
+            except BaseException:
+                # The session may be unusable after a failed flush, so release the lease in a
+                # fresh transaction rather than leaving the job locked until it expires
+                await db.rollback()
+                await db.execute(
+                    update(ProvisioningJob).where(ProvisioningJob.id == job_id).values(claimed_until=None)
+                )
+                await db.commit()
+                raise
+            job.claimed_until = None
+            await db.commit()
+            return delay
+
+    def _fail(self, job: ProvisioningJob, error: str):
+        job.status = "failed"
+        job.error = error
+        self.failed += 1
+
+    def _retry(self, job: ProvisioningJob, error: str) -> Optional[float]:
+        """Back off before the next create attempt, failing the job once attempts run out"""
+        if job.attempts >= PROVISION_MAX_ATTEMPTS:
+            self._fail(job, error)
+            return None
+        job.error = f"{error}, retrying"
+        return min(PROVISION_RETRY_MAX_DELAY, PROVISION_RETRY_DELAY * 2 ** (job.attempts - 1))
+
+    async def _advance(self, db, job: ProvisioningJob) -> Optional[float]:
+        if job.status == "queued":
+            job.status = "creating"
+
+        if job.status == "creating":
+            job.attempts += 1
+            await db.commit()
+
+            # A previous attempt may have created the server before failing to record it
+            upstream = await pterodactyl_client.get_server_by_external_id(job.id)
+            if upstream is None:
+                user = await db.get(User, job.user_id)
+                if user is None:
+                    self._fail(job, "User no longer exists")
+                    return None
+                config = get_config()
+                placement = await node_placement.reserve(
+                    job.id,
+                    memory=config.server.default_memory,
+                    disk=config.server.default_disk,
+                    cpu=config.server.default_cpu,
+                    preferred_node=config.app.default_node
+                )
+                if placement is None:
+                    return self._retry(job, "No node has a free allocation and enough capacity")
+                upstream = await pterodactyl_client.create_server(
+                    user_id=user.pterodactyl_id,
+                    server_name=job.name,
+                    config={"allocation_id": placement.allocation_id},
+                    external_id=job.id
+                )
+                if upstream is None:
+                    node_placement.release(job.id)
+            if upstream is None:
+                return self._retry(job, "Pterodactyl panel unavailable")
+
+            attributes = upstream["attributes"]
+            server = Server(
+                user_id=job.user_id,
+                pterodactyl_id=attributes["id"],
+                pterodactyl_identifier=attributes.get("identifier"),
+                name=job.name,
+                description=job.description,
+                status="installing"
+            )
+            db.add(server)
+            await db.flush()
+            job.server_id = server.id
+            job.pterodactyl_id = attributes["id"]
+            job.status = "installing"
+            job.error = None
+            return PROVISION_POLL_INTERVAL
+
+        if job.status == "installing":
+            # Checked whatever the lookup returns, so a server deleted upstream or a panel
+            # that keeps erroring can't keep the job polling forever
+            elapsed = (datetime.utcnow() - _utc_naive(job.created_at)).total_seconds()
+            upstream = await pterodactyl_client.get_server_by_external_id(job.id)
+            if upstream is None:
+                if elapsed > PROVISION_INSTALL_TIMEOUT:
+                    self._fail(job, "Timed out waiting for the server to install; it was not found on the panel")
+                    return None
+                return PROVISION_POLL_INTERVAL
+            install_status = map_upstream_status(upstream["attributes"])
+            server = await db.get(Server, job.server_id) if job.server_id else None
+            if install_status == "installing":
+                if elapsed > PROVISION_INSTALL_TIMEOUT:
+                    self._fail(job, "Timed out waiting for the server to install")
+                    return None
+                return PROVISION_POLL_INTERVAL
+            if server is not None:
+                server.status = install_status
+            if install_status == "install_failed":
+                self._fail(job, "Server installation failed")
+            else:
+                job.status = "completed"
+                self.completed += 1
+            return None
+
+        return None
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "running": self._queue is not None,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "tracked": len(self._tracked),
+            "scheduled": len(self._timers),
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+# Global instance
+provisioning_queue = ProvisioningQueue()
@@ -1,24 +1,120 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+import logging
 import os
-from dotenv import load_dotenv
+import time
 
-from .database.connection import engine
-from .models.database import Base
-from .routers import auth, users, servers
+from . import IMPORT_STARTED
+from .database.connection import init_async_engine, get_async_engine, dispose_async_engine
+from .routers import auth, users, servers, jobs, profiles, imports
+from .routers.responses import ORJSONUTCResponse
+from .pterodactyl.client import pterodactyl_client
+from .config.loader import config_service
+from .auth.passwords import password_pool
+from .auth.cache import principal_cache
+from .auth.security import get_current_admin_user
+from .auth.revocation import revocation_store
+from .auth.rate_limit import RATE_LIMIT_ENABLED, RateLimitMiddleware, rate_limiter
+from .pterodactyl.reconciler import status_reconciler, RECONCILE_ENABLED
+from .pterodactyl.websocket import server_event_hub
+from .pterodactyl.placement import node_placement
+from .jobs.provisioning import provisioning_queue
+from .jobs.panel_import import panel_importer
+from .jobs.leader import background_leader
+from .monitoring.metrics import (
+    METRICS_ENABLED,
+    MetricsMiddleware,
+    instrument_engine,
+    metrics_response,
+    register_pool_collector
+)
+from .monitoring.profiling import PROFILING_ENABLED, ProfilingMiddleware
+
+# The schema is managed by migrations, run separately with `alembic upgrade head`
+
+# Level of the app's own loggers, e.g. app.pterodactyl.* for upstream retries, throttling
+# and circuit breaker changes
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+def configure_logging():
+    """Send the app's log records to stderr, unless logging was already configured (e.g. logconfig)"""
+    logger = logging.getLogger("app")
+    logger.setLevel(LOG_LEVEL)
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        # The pid tells apart the workers of a prefork server writing to the same stream
+        handler.setFormatter(logging.Formatter("%(asctime)s [%(process)d] %(levelname)s %(name)s: %(message)s"))
+        logger.addHandler(handler)
+
+configure_logging()
+
+# Filled in by the lifespan of each worker and reported on /health/startup
+startup_timings = {}
+
+# Panel polling and provisioning run in one worker only, so their load on the panel's rate
+# limit doesn't grow with WEB_CONCURRENCY; background_leader picks the worker
+async def start_background_work():
+    if RECONCILE_ENABLED:
+        # Placement counts node usage from the reconciler's server listing instead of its own
+        status_reconciler.add_listener(node_placement.apply_servers)
+        status_reconciler.start()
+    node_placement.start()
+    await provisioning_queue.start()
 
-load_dotenv()
+async def stop_background_work():
+    await provisioning_queue.stop()
+    await node_placement.stop()
+    await status_reconciler.stop()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Every pool, client and background task is created here rather than at import, so a
+    # prefork master can preload the app and each worker still gets its own resources
+    started = time.perf_counter()
+    # Parse and validate config.json once up front so bad config fails fast
+    config_service.load()
+    engine = init_async_engine()
+    if METRICS_ENABLED or PROFILING_ENABLED:
+        instrument_engine(engine)
+    # Open the shared Pterodactyl connection pool for the lifetime of the app
+    await pterodactyl_client.start()
+    password_pool.start()
+    await revocation_store.start()
+    await background_leader.start(start_background_work, stop_background_work)
+    startup_timings.update(
+        pid=os.getpid(),
+        import_seconds=round(IMPORT_SECONDS, 4),
+        startup_seconds=round(time.perf_counter() - started, 4)
+    )
+    print(f"Worker {os.getpid()} ready: imports {IMPORT_SECONDS:.3f}s, startup {startup_timings['startup_seconds']:.3f}s")
+    yield
+    # The server has stopped accepting requests and drained in-flight ones by now. Stop the
+    # background work, then let detached upstream calls such as power signals finish.
+    # A stopped import keeps its progress and resumes from the last batch when started again.
+    await panel_importer.stop()
+    await background_leader.stop()
+    await server_event_hub.close()
+    await revocation_store.stop()
+    await pterodactyl_client.drain()
+    password_pool.shutdown()
+    await pterodactyl_client.close()
+    await dispose_async_engine()
 
 app = FastAPI(
     title=os.getenv("APP_NAME", "MCHostPanel"),
     description=os.getenv("APP_DESCRIPTION", "Professional Minecraft Server Hosting Panel"),
-    version="1.0.0"
+    version="1.0.0",
+    # orjson encodes responses several times faster than the stdlib json module
+    default_response_class=ORJSONUTCResponse,
+    lifespan=lifespan
 )
 
+# Added first so it runs inside CORS, which lets browsers read the 429s it sends
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware
 origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 app.add_middleware(
@@ -27,12 +123,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Retry-After"],
 )
 
+# Added before the metrics middleware so it runs inside it and shares its per-request counters
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+if METRICS_ENABLED:
+    register_pool_collector(get_async_engine, pterodactyl_client, password_pool)
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(servers.router)
+app.include_router(jobs.router)
+app.include_router(profiles.router)
+app.include_router(imports.router)
 
 @app.get("/")
 async def root():
@@ -46,6 +154,61 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return metrics_response()
+
+# Only /health is public; the detailed stats expose internals such as breaker and rate limit
+# state, worker pids and import progress
+ADMIN_ONLY = [Depends(get_current_admin_user)]
+
+@app.get("/health/startup", dependencies=ADMIN_ONLY)
+async def startup_stats():
+    return startup_timings
+
+@app.get("/health/pterodactyl", dependencies=ADMIN_ONLY)
+async def pterodactyl_pool_stats():
+    return pterodactyl_client.pool_stats()
+
+@app.get("/health/reconciler", dependencies=ADMIN_ONLY)
+async def reconciler_stats():
+    return status_reconciler.stats()
+
+@app.get("/health/jobs", dependencies=ADMIN_ONLY)
+async def provisioning_stats():
+    return provisioning_queue.stats()
+
+@app.get("/health/leader", dependencies=ADMIN_ONLY)
+async def leader_stats():
+    return background_leader.stats()
+
+@app.get("/health/imports", dependencies=ADMIN_ONLY)
+async def import_stats():
+    return panel_importer.stats()
+
+@app.get("/health/placement", dependencies=ADMIN_ONLY)
+async def placement_stats():
+    return node_placement.stats()
+
+@app.get("/health/events", dependencies=ADMIN_ONLY)
+async def event_hub_stats():
+    return server_event_hub.stats()
+
+@app.get("/health/auth", dependencies=ADMIN_ONLY)
+async def auth_stats():
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "revocations": revocation_store.stats()
+    }
+
+@app.get("/health/rate-limits", dependencies=ADMIN_ONLY)
+async def rate_limit_stats():
+    return rate_limiter.stats()
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
 if __name__ == "__main__":
     import uvicorn
     host = os.getenv("HOST", "0.0.0.0")
@@ -56,5 +219,6 @@ if __name__ == "__main__":
         "app.main:app",
         host=host,
         port=port,
-        reload=debug
+        reload=debug,
+        workers=None if debug else int(os.getenv("WEB_CONCURRENCY", "1"))
     )
\ No newline at end of file
@@ -1,8 +1,17 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, UniqueConstraint, ForeignKey, Index, MetaData, FetchedValue
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
-Base = declarative_base()
+# Deterministic constraint names so migrations can alter them on every backend
+NAMING_CONVENTION = {
+    "ix": "ix_%(column_0_label)s",
+    "uq": "uq_%(table_name)s_%(column_0_N_name)s",
+    "ck": "ck_%(table_name)s_%(constraint_name)s",
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+    "pk": "pk_%(table_name)s",
+}
+
+Base = declarative_base(metadata=MetaData(naming_convention=NAMING_CONVENTION))
 
 class User(Base):
     __tablename__ = "users"
@@ -13,18 +22,95 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
-    pterodactyl_id = Column(Integer, nullable=True)
+    # Indexed so panel imports can match upstream users in batches
+    pterodactyl_id = Column(Integer, nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by a trigger on every UPDATE; read endpoints derive their ETags from it
+    version = Column(Integer, nullable=False, server_default="1", server_onupdate=FetchedValue())
 
 class Server(Base):
     __tablename__ = "servers"
+    __table_args__ = (
+        UniqueConstraint("user_id", "name"),
+        # Serves both "servers of a user" filters and keyset pagination by id
+        Index("ix_servers_user_id_id", "user_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False)
-    pterodactyl_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    pterodactyl_id = Column(Integer, nullable=False, index=True)
+    # Short id the client API uses in its URLs
+    pterodactyl_identifier = Column(String, nullable=True)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     status = Column(String, default="installing")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by a trigger on every UPDATE; read endpoints derive their ETags from it
+    version = Column(Integer, nullable=False, server_default="1", server_onupdate=FetchedValue())
+
+class ProvisioningJob(Base):
+    __tablename__ = "provisioning_jobs"
+    __table_args__ = (UniqueConstraint("user_id", "idempotency_key"),)
+    
+    # Also sent to Pterodactyl as the server's external_id, which makes creation idempotent
+    id = Column(String(36), primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    idempotency_key = Column(String, nullable=True)
+    name = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    status = Column(String, default="queued", index=True)
+    attempts = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    server_id = Column(Integer, nullable=True)
+    pterodactyl_id = Column(Integer, nullable=True)
+    claimed_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class TokenRevocation(Base):
+    __tablename__ = "token_revocations"
+    
+    id = Column(Integer, primary_key=True)
+    # Either one token by its jti, or every token of a subject issued up to revoked_before
+    jti = Column(String(32), nullable=True, unique=True)
+    subject = Column(String, nullable=True)
+    revoked_before = Column(DateTime, nullable=True)
+    # When the last token this covers expires; the row is useless after that
+    expires_at = Column(DateTime, nullable=False, index=True)
+    # Workers poll for rows created since their last sync
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class PanelImport(Base):
+    __tablename__ = "panel_imports"
+    
+    id = Column(Integer, primary_key=True)
+    # running -> completed | failed | cancelled; running and failed imports can be resumed
+    status = Column(String, default="running", index=True)
+    # users, then servers; next_page is the first page of the phase not yet written
+    phase = Column(String, default="users")
+    next_page = Column(Integer, default=1)
+    total_pages = Column(Integer, nullable=True)
+    users_seen = Column(Integer, default=0)
+    users_created = Column(Integer, default=0)
+    users_linked = Column(Integer, default=0)
+    users_skipped = Column(Integer, default=0)
+    servers_seen = Column(Integer, default=0)
+    servers_created = Column(Integer, default=0)
+    servers_updated = Column(Integer, default=0)
+    servers_skipped = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    # Held by the process running the import, renewed with every batch
+    claimed_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+class BackgroundLease(Base):
+    __tablename__ = "background_leases"
+    
+    # One row per piece of work only one process may run at a time
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
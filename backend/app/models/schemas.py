@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -34,6 +34,9 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    jti: Optional[str] = None
+    issued_at: Optional[float] = None
+    expires_at: Optional[float] = None
 
 class ServerBase(BaseModel):
     name: str
@@ -51,4 +54,72 @@ class Server(ServerBase):
     updated_at: Optional[datetime] = None
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ServerStatus(BaseModel):
+    id: int
+    pterodactyl_id: int
+    name: str
+    state: Optional[str] = None
+    resources: Optional[Dict[str, Any]] = None
+    stale: bool = False
+
+class PowerAction(BaseModel):
+    server_ids: List[int] = Field(..., min_length=1, max_length=100)
+    signal: Literal["start", "stop", "restart", "kill"]
+
+class PowerActionResult(BaseModel):
+    server_id: int
+    success: bool
+    detail: Optional[str] = None
+
+class ProvisioningJob(BaseModel):
+    id: str
+    name: str
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    server_id: Optional[int] = None
+    pterodactyl_id: Optional[int] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class RequestProfile(BaseModel):
+    id: int
+    method: str
+    path: str
+    status: int
+    trigger: str
+    started_at: float
+    duration: float
+    db_queries: int
+    db_time: float
+    upstream_calls: int
+    upstream_time: float
+    other_time: float
+    cpu_time: float
+
+class PanelImport(BaseModel):
+    id: int
+    status: str
+    phase: str
+    next_page: int
+    total_pages: Optional[int] = None
+    users_seen: int
+    users_created: int
+    users_linked: int
+    users_skipped: int
+    servers_seen: int
+    servers_created: int
+    servers_updated: int
+    servers_skipped: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
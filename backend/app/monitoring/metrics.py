@@ -0,0 +1,245 @@
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+from fastapi import Response
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+    CONTENT_TYPE_LATEST
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from starlette.routing import Match
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+# Set (e.g. by gunicorn.conf.py) when several worker processes share one /metrics endpoint
+MULTIPROCESS_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+HTTP_REQUESTS = Counter(
+    "mchostpanel_http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "mchostpanel_http_request_duration_seconds", "HTTP request latency by route", ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    "mchostpanel_http_requests_in_progress", "HTTP requests currently being served", ["method", "route"],
+    multiprocess_mode="livesum"
+)
+DB_QUERY_LATENCY = Histogram(
+    "mchostpanel_db_query_duration_seconds", "Database statement execution time", buckets=LATENCY_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "mchostpanel_db_queries_per_request", "Database statements issued per HTTP request", ["route"],
+    buckets=QUERY_COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "mchostpanel_db_time_per_request_seconds", "Time spent in database statements per HTTP request", ["route"],
+    buckets=LATENCY_BUCKETS
+)
+UPSTREAM_LATENCY = Histogram(
+    "mchostpanel_pterodactyl_request_duration_seconds", "Pterodactyl API call latency by operation and status",
+    ["operation", "status"], buckets=LATENCY_BUCKETS
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    "mchostpanel_password_hash_duration_seconds", "Time spent computing bcrypt hashes", ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+PASSWORD_HASH_WAIT = Histogram(
+    "mchostpanel_password_hash_wait_seconds", "Time bcrypt jobs wait for a free worker", ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+RATE_LIMITED = Counter(
+    "mchostpanel_rate_limited_total", "Requests rejected by the rate limiter", ["policy", "key"]
+)
+
+# Numeric path segments (node IDs in paginated listings) would make one series per object
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+class RequestStats:
+    """Database and upstream time spent on behalf of one HTTP request"""
+    __slots__ = ("queries", "db_time", "upstream_calls", "upstream_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.upstream_calls = 0
+        self.upstream_time = 0.0
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+def track_request():
+    """Start attributing DB and upstream time to a new RequestStats in the current context"""
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+def untrack_request(token):
+    _request_stats.reset(token)
+
+def observe_upstream(operation: str, status: Any, seconds: float):
+    """Record one Pterodactyl API attempt"""
+    UPSTREAM_LATENCY.labels(_ID_SEGMENT.sub("/{id}", operation), str(status)).observe(seconds)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.upstream_calls += 1
+        stats.upstream_time += seconds
+
+def instrument_engine(engine):
+    """Time every statement on a (sync or async) engine and attribute it to the current request"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_LATENCY.observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+
+def _route_for(scope) -> str:
+    """Route template for a request, so metrics get one series per route rather than per URL"""
+    app = scope.get("app")
+    partial = None
+    for route in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+class MetricsMiddleware:
+    """Plain ASGI middleware recording latency, status, in-flight requests and DB usage per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_for(scope)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats, token = track_request()
+        in_progress = HTTP_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            untrack_request(token)
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.db_time)
+
+class PoolCollector:
+    """Reads pool utilisation at scrape time, so the hot path pays nothing for it"""
+
+    def __init__(self, get_engine, pterodactyl_client, password_pool):
+        # The engine only exists while the app is running, so it is looked up on each scrape
+        self.get_engine = get_engine
+        self.pterodactyl_client = pterodactyl_client
+        self.password_pool = password_pool
+
+    def collect(self):
+        pool = getattr(self.get_engine(), "pool", None)
+        if hasattr(pool, "checkedout"):
+            db = GaugeMetricFamily("mchostpanel_db_pool_connections", "Database pool connections by state",
+                                   labels=["state"])
+            db.add_metric(["checked_out"], pool.checkedout())
+            db.add_metric(["checked_in"], pool.checkedin())
+            db.add_metric(["overflow"], max(0, pool.overflow()))
+            db.add_metric(["size"], pool.size())
+            yield db
+
+        stats = self.pterodactyl_client.pool_stats()
+        http = GaugeMetricFamily("mchostpanel_pterodactyl_pool_connections", "Pterodactyl connection pool by state",
+                                 labels=["state"])
+        http.add_metric(["open"], stats["connections"])
+        http.add_metric(["idle"], stats["idle_connections"])
+        http.add_metric(["max"], stats["max_connections"])
+        yield http
+        yield GaugeMetricFamily("mchostpanel_pterodactyl_requests_in_flight", "Pterodactyl requests in flight",
+                                value=stats["requests_in_flight"])
+        yield CounterMetricFamily("mchostpanel_pterodactyl_retries", "Pterodactyl requests retried",
+                                  value=stats["retries"])
+        yield CounterMetricFamily("mchostpanel_pterodactyl_calls_saved", "Pterodactyl calls saved by coalescing and memoization",
+                                  value=stats["upstream_calls_saved"])
+
+        tokens = GaugeMetricFamily("mchostpanel_pterodactyl_rate_limit_tokens", "Rate-limit tokens left per API key",
+                                   labels=["api"])
+        throttled = CounterMetricFamily("mchostpanel_pterodactyl_throttled", "Requests delayed by the rate limiter",
+                                        labels=["api"])
+        for api, bucket in stats["rate_limits"].items():
+            tokens.add_metric([api], bucket["tokens"])
+            throttled.add_metric([api], bucket["throttled"])
+        yield tokens
+        yield throttled
+
+        breakers = GaugeMetricFamily("mchostpanel_pterodactyl_circuit_open", "1 when the circuit for an operation is not closed",
+                                     labels=["operation"])
+        open_circuits = {}
+        for name, breaker in stats["circuit_breakers"].items():
+            operation = _ID_SEGMENT.sub("/{id}", name)
+            open_circuits[operation] = max(open_circuits.get(operation, 0), int(breaker["state"] != "closed"))
+        for operation, value in open_circuits.items():
+            breakers.add_metric([operation], value)
+        yield breakers
+
+        passwords = self.password_pool.stats()
+        hashing = GaugeMetricFamily("mchostpanel_password_pool_jobs", "bcrypt jobs running or waiting, and the limit",
+                                    labels=["state"])
+        hashing.add_metric(["pending"], passwords["pending"])
+        hashing.add_metric(["max_queue"], passwords["max_queue"])
+        hashing.add_metric(["workers"], passwords["workers"])
+        yield hashing
+        yield CounterMetricFamily("mchostpanel_password_pool_rejected", "bcrypt jobs rejected because the pool was full",
+                                  value=passwords["rejected_total"])
+
+_pool_collector: Optional[PoolCollector] = None
+
+def register_pool_collector(get_engine, pterodactyl_client, password_pool):
+    global _pool_collector
+    _pool_collector = PoolCollector(get_engine, pterodactyl_client, password_pool)
+    REGISTRY.register(_pool_collector)
+
+def metrics_response() -> Response:
+    registry = REGISTRY
+    if MULTIPROCESS_DIR:
+        # Merge every worker's samples; pool gauges describe the worker serving this scrape
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        if _pool_collector is not None:
+            registry.register(_pool_collector)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
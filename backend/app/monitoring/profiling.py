@@ -0,0 +1,198 @@
+import itertools
+import os
+import random
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+from fastapi import HTTPException
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+from pyinstrument.session import Session
+
+from ..auth.security import authenticate_token
+from ..database.connection import AsyncSessionLocal
+from .metrics import current_request_stats, track_request, untrack_request
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+# Fraction of requests profiled at random; admins can also ask for one with PROFILE_HEADER
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", "50"))
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile-Request")
+
+def _short_path(path: str) -> str:
+    _, marker, rest = path.partition("site-packages/")
+    if marker:
+        return rest
+    cwd = os.getcwd()
+    return os.path.relpath(path, cwd) if path.startswith(cwd) else path
+
+def _frame_label(identifier: str) -> str:
+    # pyinstrument identifiers are "function\x00path\x00line", optionally followed by \x01 attributes
+    parts = identifier.split("\x01", 1)[0].split("\x00")
+    if len(parts) < 3:
+        # Synthetic frames such as [await] and [self]
+        return identifier
+    function, path, line = parts[:3]
+    return f"{function} ({_short_path(path)}:{line})".replace(";", ",")
+
+@dataclass
+class RequestProfile:
+    id: int
+    method: str
+    path: str
+    status: int
+    trigger: str
+    started_at: float
+    duration: float
+    db_queries: int
+    db_time: float
+    upstream_calls: int
+    upstream_time: float
+    session: Session
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration": round(self.duration, 6),
+            "db_queries": self.db_queries,
+            "db_time": round(self.db_time, 6),
+            "upstream_calls": self.upstream_calls,
+            "upstream_time": round(self.upstream_time, 6),
+            # Upstream calls may overlap, so this is a lower bound on CPU and other awaits
+            "other_time": round(max(0.0, self.duration - self.db_time - self.upstream_time), 6),
+            "cpu_time": round(self.session.cpu_time, 6),
+        }
+
+    def collapsed(self) -> str:
+        """Folded stacks ("frame;frame;frame microseconds"), as read by flamegraph.pl and speedscope"""
+        totals: Dict[str, float] = defaultdict(float)
+        for stack, seconds in self.session.frame_records:
+            totals[";".join(_frame_label(frame) for frame in stack)] += seconds
+        return "".join(
+            f"{stack} {round(seconds * 1_000_000)}\n" for stack, seconds in totals.items() if seconds > 0
+        )
+
+    def speedscope(self) -> str:
+        return SpeedscopeRenderer().render(self.session)
+
+class ProfileStore:
+    """Bounded ring of the most recent request profiles"""
+
+    def __init__(self, size: int = PROFILE_RING_SIZE):
+        self.size = size
+        self._profiles: Deque[RequestProfile] = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self.recorded = 0
+
+    def add(self, **fields) -> RequestProfile:
+        profile = RequestProfile(id=next(self._ids), **fields)
+        self._profiles.append(profile)
+        self.recorded += 1
+        return profile
+
+    def list(self) -> List[RequestProfile]:
+        return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def clear(self):
+        self._profiles.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": self.size, "stored": len(self._profiles), "recorded": self.recorded}
+
+# Global instance
+profile_store = ProfileStore()
+
+class ProfilingMiddleware:
+    """Captures a sampling call-stack profile of selected requests, including time spent awaiting"""
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE, interval: float = PROFILE_INTERVAL,
+                 header: str = PROFILE_HEADER, store: ProfileStore = profile_store):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.header = header.lower().encode("latin-1")
+        self.store = store
+
+    async def _is_admin(self, headers: Dict[bytes, bytes]) -> bool:
+        scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        try:
+            async with AsyncSessionLocal() as db:
+                user = await authenticate_token(token, db)
+        except HTTPException:
+            return False
+        return bool(user.is_active and user.is_admin)
+
+    async def _trigger(self, scope) -> Optional[str]:
+        headers = dict(scope["headers"])
+        # The header is ignored unless it comes with an admin token
+        if self.header in headers and await self._is_admin(headers):
+            return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = await self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # Share the metrics middleware's counters when present; they may already include the admin check
+        stats, token = current_request_stats(), None
+        if stats is None:
+            stats, token = track_request()
+        queries, db_time = stats.queries, stats.db_time
+        upstream_calls, upstream_time = stats.upstream_calls, stats.upstream_time
+
+        # async_mode attributes time to the awaiting coroutine instead of whatever else the loop runs
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        started_at = time.time()
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session = profiler.stop()
+            duration = time.perf_counter() - started
+            if token is not None:
+                untrack_request(token)
+            self.store.add(
+                method=scope["method"],
+                path=scope["path"],
+                status=status_code,
+                trigger=trigger,
+                started_at=started_at,
+                duration=duration,
+                db_queries=stats.queries - queries,
+                db_time=stats.db_time - db_time,
+                upstream_calls=stats.upstream_calls - upstream_calls,
+                upstream_time=stats.upstream_time - upstream_time,
+                session=session
+            )
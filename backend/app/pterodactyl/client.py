@@ -1,10 +1,44 @@
+import asyncio
 import httpx
-import json
+import logging
 import os
-from typing import Optional, Dict, Any
-from dotenv import load_dotenv
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Hashable, List, Tuple
 
-load_dotenv()
+from ..config.loader import get_config
+from ..monitoring.metrics import observe_upstream
+from .resilience import (
+    TokenBucket,
+    CircuitBreaker,
+    backoff_delay,
+    APPLICATION_RATE_LIMIT,
+    CLIENT_RATE_LIMIT,
+    RETRY_ATTEMPTS
+)
+
+# Connection pool settings for the shared upstream client
+POOL_MAX_CONNECTIONS = int(os.getenv("PTERODACTYL_POOL_MAX_CONNECTIONS", "100"))
+POOL_MAX_KEEPALIVE = int(os.getenv("PTERODACTYL_POOL_MAX_KEEPALIVE", "20"))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("PTERODACTYL_POOL_KEEPALIVE_EXPIRY", "30"))
+HTTP2_ENABLED = os.getenv("PTERODACTYL_HTTP2", "False").lower() == "true"
+
+# Per-operation timeouts (seconds)
+CONNECT_TIMEOUT = float(os.getenv("PTERODACTYL_CONNECT_TIMEOUT", "5"))
+DEFAULT_TIMEOUT = float(os.getenv("PTERODACTYL_TIMEOUT", "30"))
+CREATE_SERVER_TIMEOUT = float(os.getenv("PTERODACTYL_CREATE_SERVER_TIMEOUT", "60"))
+POWER_TIMEOUT = float(os.getenv("PTERODACTYL_POWER_TIMEOUT", "30"))
+
+# Short-lived memoization of read calls (seconds; 0 disables, coalescing still applies)
+MEMO_TTL = float(os.getenv("PTERODACTYL_MEMO_TTL", "2"))
+MEMO_MAX_ENTRIES = int(os.getenv("PTERODACTYL_MEMO_MAX_ENTRIES", "10000"))
+# How long shutdown waits for in-flight calls (e.g. power signals) before closing the pool
+DRAIN_TIMEOUT = float(os.getenv("PTERODACTYL_DRAIN_TIMEOUT", "10"))
+
+# Only these are retried; a repeated POST could create a second user or server
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+logger = logging.getLogger(__name__)
 
 class PterodactylClient:
     def __init__(self):
@@ -12,8 +46,209 @@ class PterodactylClient:
         self.api_key = os.getenv("PTERODACTYL_API_KEY", "")
         self.admin_token = os.getenv("PTERODACTYL_ADMIN_TOKEN", "")
         
+        self.timeouts = {
+            "default": DEFAULT_TIMEOUT,
+            "create_server": CREATE_SERVER_TIMEOUT,
+            "power": POWER_TIMEOUT,
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+        self._requests_total = 0
+        self._in_flight = 0
+        self.memo_ttl = MEMO_TTL
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # Insertion order is expiry order, since every entry lives for the same memo_ttl
+        self._memo: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # Bumped on invalidation so reads started before a write are not memoized
+        self._generations: Dict[Hashable, int] = {}
+        self.coalesced_calls = 0
+        self.memo_hits = 0
+        # The panel rate-limits application and client API keys separately
+        self._application_bucket = TokenBucket(APPLICATION_RATE_LIMIT)
+        self._client_bucket = TokenBucket(CLIENT_RATE_LIMIT)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+    
+    async def start(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """Open the shared connection pool (called from the app lifespan).
+        
+        A custom transport can be passed to talk to an in-process panel, e.g. in benchmarks.
+        """
         if not all([self.base_url, self.api_key, self.admin_token]):
             raise ValueError("Pterodactyl configuration is incomplete. Check your environment variables.")
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                transport=transport,
+                limits=httpx.Limits(
+                    max_connections=POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=POOL_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT),
+                http2=HTTP2_ENABLED
+            )
+    
+    async def drain(self, timeout: float = DRAIN_TIMEOUT):
+        """Wait for in-flight upstream calls, such as power signals, to finish before closing"""
+        tasks = [task for task in self._inflight.values() if not task.done()]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            if pending:
+                logger.warning("Closing Pterodactyl client with %s calls still in flight", len(pending))
+    
+    async def close(self):
+        """Close the shared connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _get_client(self) -> httpx.AsyncClient:
+        # Fall back to opening the pool lazily when used outside the lifespan
+        if self._client is None or self._client.is_closed:
+            await self.start()
+        return self._client
+    
+    def _timeout(self, operation: str) -> httpx.Timeout:
+        return httpx.Timeout(self.timeouts.get(operation, DEFAULT_TIMEOUT), connect=CONNECT_TIMEOUT)
+    
+    def _get_breaker(self, operation: str) -> CircuitBreaker:
+        breaker = self._breakers.get(operation)
+        if breaker is None:
+            breaker = CircuitBreaker(operation)
+            self._breakers[operation] = breaker
+        return breaker
+    
+    async def _request(self, method: str, url: str, operation: str = "default", **kwargs) -> httpx.Response:
+        """Send a request through the rate limiter, circuit breaker and retry policy.
+        
+        Raises UpstreamUnavailable without contacting the panel when the circuit for
+        ``operation`` is open or no rate-limit token frees up in time.
+        """
+        client = await self._get_client()
+        breaker = self._get_breaker(operation)
+        bucket = self._application_bucket if "/api/application/" in url else self._client_bucket
+        attempts = max(1, RETRY_ATTEMPTS) if method in IDEMPOTENT_METHODS else 1
+        
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            await bucket.acquire()
+            breaker.before_call()
+            self._requests_total += 1
+            self._in_flight += 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, timeout=self._timeout(operation), **kwargs)
+            except httpx.TransportError as e:
+                observe_upstream(operation, type(e).__name__, time.perf_counter() - started)
+                breaker.record_failure()
+                if last_attempt:
+                    raise
+                self.retries += 1
+                delay = backoff_delay(attempt)
+                logger.info("Retrying %s %s in %.2fs after %s (attempt %d of %d)",
+                            method, operation, delay, type(e).__name__, attempt + 1, attempts)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+            finally:
+                self._in_flight -= 1
+            
+            observe_upstream(operation, response.status_code, time.perf_counter() - started)
+            bucket.update(response.status_code, response.headers)
+            if response.status_code >= 500:
+                breaker.record_failure()
+            elif response.status_code == 429:
+                # Throttling is handled by the bucket; it says nothing about panel health
+                breaker.release()
+            else:
+                breaker.record_success()
+            
+            if (response.status_code == 429 or response.status_code >= 500) and not last_attempt:
+                self.retries += 1
+                delay = backoff_delay(attempt)
+                logger.info("Retrying %s %s in %.2fs after HTTP %d (attempt %d of %d)",
+                            method, operation, delay, response.status_code, attempt + 1, attempts)
+                await asyncio.sleep(delay)
+                continue
+            return response
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics for monitoring"""
+        stats = {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": HTTP2_ENABLED,
+            "max_connections": POOL_MAX_CONNECTIONS,
+            "max_keepalive_connections": POOL_MAX_KEEPALIVE,
+            "keepalive_expiry": POOL_KEEPALIVE_EXPIRY,
+            "requests_total": self._requests_total,
+            "requests_in_flight": self._in_flight,
+            "coalesced_calls": self.coalesced_calls,
+            "memo_hits": self.memo_hits,
+            "upstream_calls_saved": self.coalesced_calls + self.memo_hits,
+            "memo_entries": len(self._memo),
+            "retries": self.retries,
+            "rate_limits": {
+                "application": self._application_bucket.stats(),
+                "client": self._client_bucket.stats(),
+            },
+            "circuit_breakers": {name: breaker.stats() for name, breaker in self._breakers.items()},
+            "connections": 0,
+            "idle_connections": 0,
+        }
+        if stats["open"]:
+            # httpx does not expose pool state publicly; read it from the httpcore pool
+            pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            stats["connections"] = len(connections)
+            stats["idle_connections"] = sum(1 for conn in connections if conn.is_idle())
+        return stats
+    
+    async def _singleflight(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``factory`` once for concurrent callers sharing the same key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            
+            def _forget(_):
+                # An invalidation may already have replaced this entry with a newer call
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+            
+            task.add_done_callback(_forget)
+        else:
+            self.coalesced_calls += 1
+        # Shield so one caller going away doesn't cancel the call for the others
+        return await asyncio.shield(task)
+    
+    async def _cached_read(self, operation: str, resource: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        key = (operation, resource)
+        if self.memo_ttl > 0:
+            entry = self._memo.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.memo_hits += 1
+                return entry[1]
+        generation = self._generations.get(resource, 0)
+        result = await self._singleflight(key, factory)
+        if self.memo_ttl > 0 and result is not None and self._generations.get(resource, 0) == generation:
+            now = time.monotonic()
+            self._memo[key] = (now + self.memo_ttl, result)
+            self._memo.move_to_end(key)
+            # Drop expired entries from the front, then the oldest live ones beyond the bound
+            while self._memo and next(iter(self._memo.values()))[0] <= now:
+                self._memo.popitem(last=False)
+            while len(self._memo) > MEMO_MAX_ENTRIES:
+                self._memo.popitem(last=False)
+        return result
+    
+    def invalidate(self, resource: Hashable):
+        """Forget memoized and in-flight reads for a resource, e.g. ("server", id)"""
+        self._generations[resource] = self._generations.get(resource, 0) + 1
+        for key in [key for key in self._memo if key[1] == resource]:
+            del self._memo[key]
+        for key in [key for key in self._inflight if isinstance(key, tuple) and key[1:] == (resource,)]:
+            del self._inflight[key]
     
     def _get_headers(self, admin: bool = False):
         token = self.admin_token if admin else self.api_key
@@ -34,181 +269,292 @@ class PterodactylClient:
             "password": password
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url, 
-                    json=data, 
-                    headers=self._get_headers(admin=True),
-                    timeout=30
-                )
-                if response.status_code == 201:
-                    return response.json()
-                else:
-                    print(f"Failed to create user: {response.status_code} - {response.text}")
-                    return None
-            except Exception as e:
-                print(f"Error creating user: {e}")
+        try:
+            response = await self._request(
+                "POST",
+                url,
+                operation="create_user",
+                json=data,
+                headers=self._get_headers(admin=True)
+            )
+            if response.status_code == 201:
+                return response.json()
+            else:
+                logger.error("Failed to create user: %s - %s", response.status_code, response.text)
                 return None
+        except Exception as e:
+            logger.error("Error creating user: %s", e)
+            return None
     
     async def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user information from Pterodactyl"""
+        return await self._cached_read("get_user", ("user", user_id), lambda: self._fetch_user(user_id))
+    
+    async def _fetch_user(self, user_id: int) -> Optional[Dict[str, Any]]:
         url = f"{self.base_url}/api/application/users/{user_id}"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    url,
-                    headers=self._get_headers(admin=True),
-                    timeout=30
-                )
-                if response.status_code == 200:
-                    return response.json()
-                return None
-            except Exception as e:
-                print(f"Error getting user: {e}")
-                return None
+        try:
+            response = await self._request(
+                "GET",
+                url,
+                operation="get_user",
+                headers=self._get_headers(admin=True)
+            )
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            logger.warning("Error getting user: %s", e)
+            return None
     
-    async def create_server(self, user_id: int, server_name: str, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def create_server(self, user_id: int, server_name: str, config: Dict[str, Any],
+                            external_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Create a server in Pterodactyl panel"""
         url = f"{self.base_url}/api/application/servers"
         
-        # Load default config
-        with open("/home/runner/work/mchostpanel/mchostpanel/config.json", "r") as f:
-            default_config = json.load(f)
-        
-        server_config = default_config["server_config"]
+        server_config = get_config().server
         
         data = {
             "name": server_name,
             "user": user_id,
-            "egg": server_config["default_egg"],
-            "docker_image": server_config["image"],
-            "startup": server_config["startup_command"],
-            "environment": server_config["environment"],
+            "egg": server_config.default_egg,
+            "docker_image": server_config.image,
+            "startup": server_config.startup_command,
+            "environment": dict(server_config.environment),
             "limits": {
-                "memory": server_config["default_memory"],
+                "memory": server_config.default_memory,
                 "swap": 0,
-                "disk": server_config["default_disk"],
+                "disk": server_config.default_disk,
                 "io": 500,
-                "cpu": server_config["default_cpu"]
+                "cpu": server_config.default_cpu
             },
             "feature_limits": {
-                "databases": server_config["default_databases"],
-                "allocations": server_config["default_allocations"],
-                "backups": server_config["default_backups"]
+                "databases": server_config.default_databases,
+                "allocations": server_config.default_allocations,
+                "backups": server_config.default_backups
             },
             "allocation": {
                 "default": config.get("allocation_id", 1)
             }
         }
+        if external_id:
+            # The panel rejects duplicate external IDs, so retried creates can't double-provision
+            data["external_id"] = external_id
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url,
-                    json=data,
-                    headers=self._get_headers(admin=True),
-                    timeout=60
-                )
-                if response.status_code == 201:
-                    return response.json()
-                else:
-                    print(f"Failed to create server: {response.status_code} - {response.text}")
-                    return None
-            except Exception as e:
-                print(f"Error creating server: {e}")
+        try:
+            response = await self._request(
+                "POST",
+                url,
+                operation="create_server",
+                json=data,
+                headers=self._get_headers(admin=True)
+            )
+            if response.status_code == 201:
+                self.invalidate(("user", user_id))
+                return response.json()
+            else:
+                logger.error("Failed to create server: %s - %s", response.status_code, response.text)
                 return None
+        except Exception as e:
+            logger.error("Error creating server: %s", e)
+            return None
+    
+    async def get_server(self, server_id: int) -> Optional[Dict[str, Any]]:
+        """Get a server by its numeric ID via the application API"""
+        url = f"{self.base_url}/api/application/servers/{server_id}"
+        
+        try:
+            response = await self._request(
+                "GET",
+                url,
+                operation="get_server",
+                headers=self._get_headers(admin=True)
+            )
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            logger.warning("Error getting server: %s", e)
+            return None
+    
+    async def get_server_by_external_id(self, external_id: str) -> Optional[Dict[str, Any]]:
+        """Get a server by its external ID via the application API"""
+        url = f"{self.base_url}/api/application/servers/external/{external_id}"
+        
+        try:
+            response = await self._request(
+                "GET",
+                url,
+                operation="get_server_by_external_id",
+                headers=self._get_headers(admin=True)
+            )
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            logger.warning("Error getting server by external id: %s", e)
+            return None
+    
+    async def _paginate_pages(self, path: str, per_page: int = 100,
+                              start_page: int = 1) -> AsyncIterator[Tuple[int, int, List[Dict[str, Any]]]]:
+        """Yield (page, total_pages, objects) for each page of an application API listing.
+        
+        Raises on upstream errors so callers never mistake a partial listing for a full one.
+        """
+        page = start_page
+        while True:
+            response = await self._request(
+                "GET",
+                f"{self.base_url}{path}",
+                operation=f"list:{path}",
+                params={"page": page, "per_page": per_page},
+                headers=self._get_headers(admin=True)
+            )
+            response.raise_for_status()
+            payload = response.json()
+            pagination = payload.get("meta", {}).get("pagination", {})
+            total_pages = pagination.get("total_pages", page)
+            yield page, total_pages, [item["attributes"] for item in payload.get("data", [])]
+            if page >= total_pages:
+                return
+            page += 1
+    
+    async def _paginate(self, path: str, per_page: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every object from a paginated application API listing, one page at a time"""
+        async for _, _, items in self._paginate_pages(path, per_page):
+            for item in items:
+                yield item
+    
+    def iter_servers(self, per_page: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over all servers on the panel via the application API"""
+        return self._paginate("/api/application/servers", per_page)
+    
+    def iter_server_pages(self, per_page: int = 100, start_page: int = 1):
+        """Iterate over the panel's server listing page by page, starting at start_page"""
+        return self._paginate_pages("/api/application/servers", per_page, start_page)
+    
+    def iter_user_pages(self, per_page: int = 100, start_page: int = 1):
+        """Iterate over the panel's user listing page by page, starting at start_page"""
+        return self._paginate_pages("/api/application/users", per_page, start_page)
+    
+    def iter_nodes(self, per_page: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over all nodes on the panel via the application API"""
+        return self._paginate("/api/application/nodes", per_page)
+    
+    def iter_node_allocations(self, node_id: int, per_page: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over every allocation on a node via the application API"""
+        return self._paginate(f"/api/application/nodes/{node_id}/allocations", per_page)
     
     async def get_user_servers(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get all servers for a user"""
+        return await self._cached_read("get_user_servers", ("user", user_id), lambda: self._fetch_user_servers(user_id))
+    
+    async def _fetch_user_servers(self, user_id: int) -> Optional[Dict[str, Any]]:
         url = f"{self.base_url}/api/client"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    url,
-                    headers=self._get_headers(admin=False),
-                    timeout=30
-                )
-                if response.status_code == 200:
-                    return response.json()
-                return None
-            except Exception as e:
-                print(f"Error getting user servers: {e}")
-                return None
+        try:
+            response = await self._request(
+                "GET",
+                url,
+                operation="get_user_servers",
+                headers=self._get_headers(admin=False)
+            )
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            logger.warning("Error getting user servers: %s", e)
+            return None
     
     async def get_server_status(self, server_id: str) -> Optional[Dict[str, Any]]:
         """Get server status and information"""
+        return await self._cached_read("get_server_status", ("server", server_id), lambda: self._fetch_server_status(server_id))
+    
+    async def _fetch_server_status(self, server_id: str) -> Optional[Dict[str, Any]]:
         url = f"{self.base_url}/api/client/servers/{server_id}"
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    url,
-                    headers=self._get_headers(admin=False),
-                    timeout=30
-                )
-                if response.status_code == 200:
-                    return response.json()
-                return None
-            except Exception as e:
-                print(f"Error getting server status: {e}")
-                return None
+        try:
+            response = await self._request(
+                "GET",
+                url,
+                operation="get_server_status",
+                headers=self._get_headers(admin=False)
+            )
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            logger.warning("Error getting server status: %s", e)
+            return None
+    
+    async def get_server_resources(self, server_id: str) -> Optional[Dict[str, Any]]:
+        """Get live server state and resource usage"""
+        url = f"{self.base_url}/api/client/servers/{server_id}/resources"
+        
+        try:
+            response = await self._request(
+                "GET",
+                url,
+                operation="get_server_resources",
+                headers=self._get_headers(admin=False)
+            )
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            logger.warning("Error getting server resources: %s", e)
+            return None
+    
+    async def get_websocket_credentials(self, server_id: str) -> Optional[Dict[str, Any]]:
+        """Get a websocket token and socket URL for a server"""
+        url = f"{self.base_url}/api/client/servers/{server_id}/websocket"
+        
+        try:
+            response = await self._request(
+                "GET",
+                url,
+                operation="get_websocket_credentials",
+                headers=self._get_headers(admin=False)
+            )
+            if response.status_code == 200:
+                return response.json().get("data")
+            return None
+        except Exception as e:
+            logger.warning("Error getting websocket credentials: %s", e)
+            return None
+    
+    async def _send_power_signal(self, server_id: str, signal: str) -> bool:
+        url = f"{self.base_url}/api/client/servers/{server_id}/power"
+        response = await self._request(
+            "POST",
+            url,
+            operation="power",
+            json={"signal": signal},
+            headers=self._get_headers(admin=False)
+        )
+        return response.status_code == 204
+    
+    async def send_power_signal(self, server_id: str, signal: str) -> bool:
+        """Send a power signal, sharing the result with identical signals already in flight"""
+        try:
+            return await self._singleflight(("power", server_id, signal), lambda: self._send_power_signal(server_id, signal))
+        except Exception as e:
+            logger.warning("Error sending %s signal to server %s: %s", signal, server_id, e)
+            return False
+        finally:
+            self.invalidate(("server", server_id))
     
     async def start_server(self, server_id: str) -> bool:
         """Start a server"""
-        url = f"{self.base_url}/api/client/servers/{server_id}/power"
-        data = {"signal": "start"}
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url,
-                    json=data,
-                    headers=self._get_headers(admin=False),
-                    timeout=30
-                )
-                return response.status_code == 204
-            except Exception as e:
-                print(f"Error starting server: {e}")
-                return False
+        return await self.send_power_signal(server_id, "start")
     
     async def stop_server(self, server_id: str) -> bool:
         """Stop a server"""
-        url = f"{self.base_url}/api/client/servers/{server_id}/power"
-        data = {"signal": "stop"}
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url,
-                    json=data,
-                    headers=self._get_headers(admin=False),
-                    timeout=30
-                )
-                return response.status_code == 204
-            except Exception as e:
-                print(f"Error stopping server: {e}")
-                return False
+        return await self.send_power_signal(server_id, "stop")
     
     async def restart_server(self, server_id: str) -> bool:
         """Restart a server"""
-        url = f"{self.base_url}/api/client/servers/{server_id}/power"
-        data = {"signal": "restart"}
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    url,
-                    json=data,
-                    headers=self._get_headers(admin=False),
-                    timeout=30
-                )
-                return response.status_code == 204
-            except Exception as e:
-                print(f"Error restarting server: {e}")
-                return False
+        return await self.send_power_signal(server_id, "restart")
 
 # Global instance
-pterodactyl_client = PterodactylClient()
\ No newline at end of file
+pterodactyl_client = PterodactylClient()
@@ -0,0 +1,327 @@
+import asyncio
+import math
+import os
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, List, Optional
+
+from .client import pterodactyl_client
+
+# How often the node list is re-read and the allocations of changed nodes reloaded
+PLACEMENT_REFRESH_INTERVAL = float(os.getenv("PLACEMENT_REFRESH_INTERVAL", "60"))
+# Node usage comes from the reconciler's server listing; placement only lists servers itself
+# when it hasn't been handed one for this long (e.g. with RECONCILE_ENABLED=false)
+PLACEMENT_USAGE_MAX_AGE = float(os.getenv("PLACEMENT_USAGE_MAX_AGE", "180"))
+# How long a reservation holds an allocation before the next refresh may hand it out again
+PLACEMENT_RESERVATION_TTL = float(os.getenv("PLACEMENT_RESERVATION_TTL", "300"))
+# Pterodactyl doesn't track node CPU capacity; set this (in %) to cap CPU per node, 0 for no cap
+PLACEMENT_NODE_CPU = int(os.getenv("PLACEMENT_NODE_CPU", "0"))
+
+def _capacity(total: int, overallocate: Optional[int]) -> float:
+    """Usable capacity of a node resource, following Pterodactyl's overallocation rules"""
+    overallocate = overallocate or 0
+    if overallocate < 0:
+        return math.inf
+    return total * (1 + overallocate / 100)
+
+@dataclass
+class NodeState:
+    id: int
+    name: str
+    memory: float
+    disk: float
+    cpu: float
+    used_memory: int = 0
+    used_disk: int = 0
+    used_cpu: int = 0
+    # Unassigned allocation IDs, in no particular order
+    free_allocations: List[int] = field(default_factory=list)
+    # Set when free_allocations may be out of date and should be read from the panel again
+    dirty: bool = True
+
+    def fits(self, memory: int, disk: int, cpu: int) -> bool:
+        return (
+            self.used_memory + memory <= self.memory
+            and self.used_disk + disk <= self.disk
+            and self.used_cpu + cpu <= self.cpu
+        )
+
+    def headroom(self, memory: int, disk: int, cpu: int) -> float:
+        """Smallest fraction of any resource left after placing the given limits"""
+        fractions = [
+            (capacity - used - wanted) / capacity
+            for capacity, used, wanted in (
+                (self.memory, self.used_memory, memory),
+                (self.disk, self.used_disk, disk),
+                (self.cpu, self.used_cpu, cpu),
+            )
+            if capacity not in (0, math.inf)
+        ]
+        return min(fractions) if fractions else math.inf
+
+    def take_allocation(self) -> int:
+        """Remove and return a random free allocation.
+
+        Another process with the same index would pick the same lowest allocation every time;
+        a random pick makes concurrent creates from different processes unlikely to collide.
+        """
+        allocations = self.free_allocations
+        index = random.randrange(len(allocations))
+        allocations[index], allocations[-1] = allocations[-1], allocations[index]
+        return allocations.pop()
+
+    def apply(self, placement: "Placement", sign: int = 1):
+        self.used_memory += sign * placement.memory
+        self.used_disk += sign * placement.disk
+        self.used_cpu += sign * placement.cpu
+
+@dataclass(frozen=True)
+class Placement:
+    node_id: int
+    allocation_id: int
+    memory: int
+    disk: int
+    cpu: int
+    expires_at: float
+
+class NodePlacement:
+    """In-memory index of node capacity and free allocations used to place new servers.
+
+    The index and its reservations are per process. Provisioning normally runs in one worker
+    (see jobs/leader.py), but a handover can briefly leave two processes placing servers,
+    and the panel is the final judge of whether an allocation is free.
+
+    Allocations are read once per node and then only for nodes marked dirty: after a failed
+    create, an expired reservation, or when the node has run out. Listing every node's
+    allocations on a timer would spend most of the application API's rate limit on large panels.
+    """
+
+    def __init__(self, refresh_interval: float = PLACEMENT_REFRESH_INTERVAL,
+                 reservation_ttl: float = PLACEMENT_RESERVATION_TTL, node_cpu: int = PLACEMENT_NODE_CPU,
+                 usage_max_age: float = PLACEMENT_USAGE_MAX_AGE):
+        self.refresh_interval = refresh_interval
+        self.reservation_ttl = reservation_ttl
+        self.node_cpu = node_cpu
+        self.usage_max_age = usage_max_age
+        self._nodes: Dict[int, NodeState] = {}
+        self._reservations: Dict[Hashable, Placement] = {}
+        self._loaded = False
+        self._usage_at: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.exhausted = 0
+        self.server_listings = 0
+        self.allocation_loads = 0
+        self.last_refresh_at: Optional[float] = None
+
+    async def refresh(self):
+        """Re-read the node list, and the server listing and allocations where out of date"""
+        async with self._refresh_lock:
+            await self._refresh()
+
+    async def _refresh(self):
+        nodes: Dict[int, NodeState] = {}
+        added = False
+        async for attributes in pterodactyl_client.iter_nodes():
+            if attributes.get("maintenance_mode"):
+                continue
+            capacity = {
+                "name": attributes.get("name", ""),
+                "memory": _capacity(attributes["memory"], attributes.get("memory_overallocate")),
+                "disk": _capacity(attributes["disk"], attributes.get("disk_overallocate")),
+                "cpu": self.node_cpu or math.inf,
+            }
+            node = self._nodes.get(attributes["id"])
+            if node is None:
+                node = NodeState(id=attributes["id"], **capacity)
+                added = True
+            else:
+                # Keeps the usage and free allocations already indexed
+                for key, value in capacity.items():
+                    setattr(node, key, value)
+            nodes[node.id] = node
+        self._nodes = nodes
+
+        # A node new to the index (or back from maintenance) may already host servers
+        if added or self._usage_at is None or time.monotonic() - self._usage_at > self.usage_max_age:
+            listing = [attributes async for attributes in pterodactyl_client.iter_servers()]
+            self.server_listings += 1
+            self.apply_servers(listing)
+
+        for node in list(self._nodes.values()):
+            if node.dirty:
+                await self._load_allocations(node)
+
+        self._loaded = True
+        self.refreshes += 1
+        self.last_refresh_at = time.time()
+
+    async def _load_allocations(self, node: NodeState):
+        # Cleared first, so a release while the listing is read marks the node for the next refresh
+        node.dirty = False
+        try:
+            free = [
+                allocation["id"]
+                async for allocation in pterodactyl_client.iter_node_allocations(node.id)
+                if not allocation.get("assigned")
+            ]
+        except BaseException:
+            node.dirty = True
+            raise
+        # No awaits from here on, so allocations reserved during the listing stay taken
+        reserved = {placement.allocation_id for placement in self._reservations.values()}
+        node.free_allocations = [allocation_id for allocation_id in free if allocation_id not in reserved]
+        self.allocation_loads += 1
+
+    def apply_servers(self, listing: List[Dict[str, Any]]):
+        """Recount node usage from a full server listing, keeping in-flight reservations"""
+        usage: Dict[int, List[int]] = defaultdict(lambda: [0, 0, 0])
+        counted = set()
+        for attributes in listing:
+            counted.add(attributes.get("allocation"))
+            limits = attributes.get("limits") or {}
+            used = usage[attributes.get("node")]
+            used[0] += limits.get("memory") or 0
+            used[1] += limits.get("disk") or 0
+            used[2] += limits.get("cpu") or 0
+        for node in self._nodes.values():
+            node.used_memory, node.used_disk, node.used_cpu = usage.get(node.id, (0, 0, 0))
+
+        now = time.monotonic()
+        for key, placement in list(self._reservations.items()):
+            node = self._nodes.get(placement.node_id)
+            if placement.allocation_id in counted:
+                # The server exists now and is counted above
+                del self._reservations[key]
+            elif placement.expires_at < now:
+                # Its allocation may still be free; the next load of the node finds out
+                del self._reservations[key]
+                if node is not None:
+                    node.dirty = True
+            elif node is not None:
+                node.apply(placement)
+        self._usage_at = now
+
+    async def reserve(self, key: Hashable, memory: int, disk: int, cpu: int,
+                      preferred_node: Optional[int] = None) -> Optional[Placement]:
+        """Reserve an allocation on the node that fits the limits most tightly.
+
+        The preferred node is filled first. Reserving again with the same key returns the
+        existing reservation. Returns None when no node has room.
+        """
+        if not self._loaded:
+            async with self._refresh_lock:
+                if not self._loaded:
+                    try:
+                        await self._refresh()
+                    except Exception as e:
+                        self.failures += 1
+                        print(f"Error loading node placement index: {e}")
+                        return None
+
+        # Selection and reservation happen without awaiting, so parallel creates in this process can't collide
+        existing = self._reservations.get(key)
+        if existing is not None:
+            return existing
+
+        best: Optional[NodeState] = None
+        best_score = None
+        for node in self._nodes.values():
+            if not node.free_allocations or not node.fits(memory, disk, cpu):
+                continue
+            score = (node.id != preferred_node, node.headroom(memory, disk, cpu))
+            if best_score is None or score < best_score:
+                best, best_score = node, score
+
+        if best is None:
+            self.exhausted += 1
+            # Servers may have been deleted on the panel since the nodes that ran out were loaded;
+            # they are read again on the next refresh, at most once per interval
+            for node in self._nodes.values():
+                if not node.free_allocations:
+                    node.dirty = True
+            return None
+
+        placement = Placement(
+            node_id=best.id,
+            allocation_id=best.take_allocation(),
+            memory=memory,
+            disk=disk,
+            cpu=cpu,
+            expires_at=time.monotonic() + self.reservation_ttl
+        )
+        best.apply(placement)
+        self._reservations[key] = placement
+        return placement
+
+    def release(self, key: Hashable):
+        """Drop a reservation after a failed create.
+
+        Its capacity is returned right away, but the allocation itself only comes back when
+        the node's allocations are next loaded, in case another process had taken it.
+        """
+        placement = self._reservations.pop(key, None)
+        if placement is None:
+            return
+        node = self._nodes.get(placement.node_id)
+        if node is not None:
+            node.apply(placement, sign=-1)
+            node.dirty = True
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                print(f"Error refreshing node placement index: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        def finite(value: float) -> Optional[float]:
+            return None if value == math.inf else value
+
+        return {
+            "running": self._task is not None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "exhausted": self.exhausted,
+            "server_listings": self.server_listings,
+            "allocation_loads": self.allocation_loads,
+            "last_refresh_at": self.last_refresh_at,
+            "reservations": len(self._reservations),
+            "nodes": [
+                {
+                    "id": node.id,
+                    "name": node.name,
+                    "free_allocations": len(node.free_allocations),
+                    "dirty": node.dirty,
+                    "memory": {"used": node.used_memory, "capacity": finite(node.memory)},
+                    "disk": {"used": node.used_disk, "capacity": finite(node.disk)},
+                    "cpu": {"used": node.used_cpu, "capacity": finite(node.cpu)},
+                }
+                for node in self._nodes.values()
+            ],
+        }
+
+# Global instance
+node_placement = NodePlacement()
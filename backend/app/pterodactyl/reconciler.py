@@ -0,0 +1,153 @@
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+
+from ..database.connection import AsyncSessionLocal
+from ..models.database import Server
+from .client import pterodactyl_client
+
+RECONCILE_ENABLED = os.getenv("RECONCILE_ENABLED", "True").lower() == "true"
+RECONCILE_INTERVAL = float(os.getenv("RECONCILE_INTERVAL", "60"))
+# Fraction of the interval added or removed at random so workers don't sync in lockstep
+RECONCILE_JITTER = float(os.getenv("RECONCILE_JITTER", "0.1"))
+RECONCILE_PAGE_SIZE = int(os.getenv("RECONCILE_PAGE_SIZE", "100"))
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", "500"))
+
+# Status stored for local rows whose server no longer exists on the panel
+MISSING_STATUS = "missing"
+# Number of orphan IDs kept in the stats for inspection
+ORPHAN_SAMPLE_SIZE = 50
+
+def map_upstream_status(attributes: Dict[str, Any]) -> str:
+    """Translate application API server attributes into the local status column"""
+    if attributes.get("suspended"):
+        return "suspended"
+    return attributes.get("status") or "installed"
+
+class StatusReconciler:
+    """Periodically syncs Server.status with the panel using bulk listings"""
+
+    def __init__(self, interval: float = RECONCILE_INTERVAL, jitter: float = RECONCILE_JITTER,
+                 page_size: int = RECONCILE_PAGE_SIZE, batch_size: int = RECONCILE_BATCH_SIZE):
+        self.interval = interval
+        self.jitter = jitter
+        self.page_size = page_size
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.last_run_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_updated = 0
+        self.local_orphans: List[int] = []
+        self.upstream_orphans: List[int] = []
+        # Called with every full server listing, so others needn't list the panel themselves
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+    def add_listener(self, listener: Callable[[List[Dict[str, Any]]], None]):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def _next_delay(self) -> float:
+        spread = self.interval * self.jitter
+        return max(1.0, self.interval + random.uniform(-spread, spread))
+
+    async def reconcile(self) -> int:
+        """Run one reconciliation pass and return the number of rows updated"""
+        started = time.monotonic()
+        # Read local rows first: rows created while the panel is listed (e.g. by provisioning)
+        # then aren't mistaken for servers missing upstream
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(select(Server.id, Server.pterodactyl_id, Server.status))).all()
+
+        upstream: Dict[int, str] = {}
+        listing: List[Dict[str, Any]] = []
+        async for attributes in pterodactyl_client.iter_servers(per_page=self.page_size):
+            upstream[attributes["id"]] = map_upstream_status(attributes)
+            if self._listeners:
+                listing.append(attributes)
+        for listener in self._listeners:
+            try:
+                listener(listing)
+            except Exception as e:
+                print(f"Error passing the server listing on: {e}")
+
+        # (status read, status wanted) -> ids
+        changes: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        local_ids = set()
+        local_orphans = []
+        for server_id, pterodactyl_id, current in rows:
+            local_ids.add(pterodactyl_id)
+            desired = upstream.get(pterodactyl_id)
+            if desired is None:
+                local_orphans.append(server_id)
+                desired = MISSING_STATUS
+            if desired != current:
+                changes[(current, desired)].append(server_id)
+
+        # One UPDATE per status transition and batch instead of one per row. Each only applies
+        # where the status is still the one read, so a status written meanwhile (e.g. by the
+        # provisioning queue) is left for the next pass.
+        updated = 0
+        async with AsyncSessionLocal() as db:
+            for (current, status), ids in changes.items():
+                for i in range(0, len(ids), self.batch_size):
+                    batch = ids[i:i + self.batch_size]
+                    unchanged = Server.status.is_(None) if current is None else Server.status == current
+                    result = await db.execute(
+                        update(Server).where(Server.id.in_(batch), unchanged).values(status=status)
+                    )
+                    updated += result.rowcount
+            await db.commit()
+
+        self.local_orphans = local_orphans[:ORPHAN_SAMPLE_SIZE]
+        self.upstream_orphans = [pid for pid in upstream if pid not in local_ids][:ORPHAN_SAMPLE_SIZE]
+        self.last_updated = updated
+        self.last_run_at = time.time()
+        self.last_duration = time.monotonic() - started
+        return updated
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._next_delay())
+            try:
+                await self.reconcile()
+                self.runs += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                print(f"Error reconciling server status: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "interval": self.interval,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at,
+            "last_duration": self.last_duration,
+            "last_updated": self.last_updated,
+            "local_orphans": self.local_orphans,
+            "upstream_orphans": self.upstream_orphans,
+        }
+
+# Global instance
+status_reconciler = StatusReconciler()
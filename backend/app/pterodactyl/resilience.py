@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, Optional
+
+# Panel defaults for APP_API_APPLICATION_RATELIMIT / APP_API_CLIENT_RATELIMIT (requests per minute)
+APPLICATION_RATE_LIMIT = int(os.getenv("PTERODACTYL_APPLICATION_RATE_LIMIT", "240"))
+CLIENT_RATE_LIMIT = int(os.getenv("PTERODACTYL_CLIENT_RATE_LIMIT", "720"))
+# The panel counts requests per API key, so worker processes sharing a key split its budget.
+# gunicorn.conf.py exports WEB_CONCURRENCY to its workers.
+RATE_LIMIT_WORKERS = max(1, int(os.getenv("PTERODACTYL_RATE_LIMIT_WORKERS", os.getenv("WEB_CONCURRENCY", "1"))))
+# Longest a call may wait for a rate-limit token before failing instead
+RATE_LIMIT_MAX_WAIT = float(os.getenv("PTERODACTYL_RATE_LIMIT_MAX_WAIT", "5"))
+
+RETRY_ATTEMPTS = int(os.getenv("PTERODACTYL_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("PTERODACTYL_RETRY_BASE_DELAY", "0.2"))
+RETRY_MAX_DELAY = float(os.getenv("PTERODACTYL_RETRY_MAX_DELAY", "5"))
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("PTERODACTYL_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("PTERODACTYL_BREAKER_RESET_TIMEOUT", "30"))
+
+logger = logging.getLogger(__name__)
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling the panel when it is known to be unavailable"""
+
+    def __init__(self, message: str, retry_after: float = 0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+class TokenBucket:
+    """Client-side rate limiter that follows the panel's X-RateLimit-* headers.
+
+    Each process keeps to its share of the panel's limit, one of `workers` equal parts.
+    """
+
+    def __init__(self, limit_per_minute: int, max_wait: float = RATE_LIMIT_MAX_WAIT,
+                 workers: int = RATE_LIMIT_WORKERS):
+        self.workers = workers
+        self.limit = self._share(limit_per_minute)
+        self.max_wait = max_wait
+        self.tokens = float(self.limit)
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._updated = time.monotonic()
+
+    def _share(self, panel_limit: int) -> int:
+        return max(1, panel_limit // self.workers)
+
+    @property
+    def rate(self) -> float:
+        return self.limit / 60.0
+
+    def _refill(self, now: float):
+        self.tokens = min(float(self.limit), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self.blocked_until and self.tokens >= 1:
+                self.tokens -= 1
+                return
+            wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            if now + wait > deadline:
+                self.throttled += 1
+                logger.warning("Pterodactyl rate limit reached; failing the call rather than waiting %.1fs", wait)
+                raise UpstreamUnavailable("Pterodactyl rate limit reached", retry_after=wait)
+            await asyncio.sleep(wait)
+
+    def update(self, status_code: int, headers):
+        now = time.monotonic()
+        self._refill(now)
+        limit = headers.get("X-RateLimit-Limit")
+        remaining = headers.get("X-RateLimit-Remaining")
+        if limit and limit.isdigit() and int(limit) > 0:
+            self.limit = self._share(int(limit))
+        if remaining and remaining.isdigit():
+            # The panel's count is authoritative when it is lower than ours
+            self.tokens = min(self.tokens, float(remaining))
+        if status_code == 429:
+            self.tokens = 0
+            retry_after = parse_retry_after(headers.get("Retry-After"))
+            self.blocked_until = now + (retry_after if retry_after is not None else 60.0 / self.limit)
+            logger.warning("Pterodactyl answered 429; holding calls for %.1fs", self.blocked_until - now)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit_per_minute": self.limit,
+            "workers": self.workers,
+            "tokens": round(self.tokens, 2),
+            "blocked_for": max(0.0, self.blocked_until - time.monotonic()),
+            "throttled": self.throttled,
+        }
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures, probing again after a cool-down"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+
+    def before_call(self):
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                logger.debug("Pterodactyl circuit open for %s; rejected a call", self.name)
+                raise UpstreamUnavailable(f"Pterodactyl circuit open for {self.name}", retry_after=remaining)
+            self.state = self.HALF_OPEN
+            logger.info("Pterodactyl circuit half-open for %s; probing", self.name)
+        if self.state == self.HALF_OPEN:
+            # Only one probe at a time while half-open
+            if self._probing:
+                self.rejected += 1
+                raise UpstreamUnavailable(f"Pterodactyl circuit half-open for {self.name}", retry_after=1)
+            self._probing = True
+
+    def release(self):
+        """End a call without an outcome (e.g. cancelled) so a half-open probe isn't stuck"""
+        self._probing = False
+
+    def record_success(self):
+        self._probing = False
+        self.failures = 0
+        if self.state != self.CLOSED:
+            logger.info("Pterodactyl circuit closed for %s", self.name)
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self._probing = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Pterodactyl circuit opened for %s after %d failures", self.name, self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures, "rejected": self.rejected}
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Entries younger than SERVER_STATUS_TTL are served as-is; entries up to
+# SERVER_STATUS_STALE_TTL old are served immediately while refreshing in the background
+SERVER_STATUS_TTL = float(os.getenv("SERVER_STATUS_TTL", "5"))
+SERVER_STATUS_STALE_TTL = float(os.getenv("SERVER_STATUS_STALE_TTL", "60"))
+SERVER_STATUS_CONCURRENCY = int(os.getenv("SERVER_STATUS_CONCURRENCY", "10"))
+
+Fetcher = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+
+class ServerStatusCache:
+    """Per-server TTL cache with stale-while-revalidate semantics"""
+
+    def __init__(self, ttl: float = SERVER_STATUS_TTL, stale_ttl: float = SERVER_STATUS_STALE_TTL,
+                 concurrency: int = SERVER_STATUS_CONCURRENCY):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.concurrency = concurrency
+        self._entries: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Bounds upstream status calls across all requests, not just one dashboard
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def _fetch(self, key: str, fetcher: Fetcher) -> Optional[Dict[str, Any]]:
+        async with self._get_semaphore():
+            value = await fetcher()
+        if value is not None:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def _refresh(self, key: str, fetcher: Fetcher) -> asyncio.Task:
+        # Share one in-flight refresh per server between concurrent callers
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, fetcher))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return task
+
+    async def get(self, key: str, fetcher: Fetcher) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Return (status, stale) for a server, fetching through ``fetcher`` when needed"""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            age = now - entry[0]
+            if age < self.ttl:
+                self.hits += 1
+                return entry[1], False
+            if age < self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh(key, fetcher)
+                return entry[1], True
+        self.misses += 1
+        value = await asyncio.shield(self._refresh(key, fetcher))
+        if value is None and entry is not None:
+            # Upstream failed; an old answer is better than none
+            return entry[1], True
+        return value, False
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshing": len(self._refreshing),
+        }
+
+# Global instance
+server_status_cache = ServerStatusCache()
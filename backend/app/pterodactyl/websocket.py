@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Any, Dict, Optional, Set
+import websockets
+
+from .client import pterodactyl_client
+
+# Events buffered per browser before the oldest ones are dropped
+WS_SUBSCRIBER_BUFFER = int(os.getenv("WS_SUBSCRIBER_BUFFER", "100"))
+WS_RECONNECT_DELAY = float(os.getenv("WS_RECONNECT_DELAY", "1"))
+WS_RECONNECT_MAX_DELAY = float(os.getenv("WS_RECONNECT_MAX_DELAY", "30"))
+
+# Upstream events forwarded to subscribers
+FORWARDED_EVENTS = {"status", "stats", "console output", "install output", "install started", "install completed"}
+
+class Subscriber:
+    """Bounded per-client event buffer that drops the oldest events when full"""
+
+    def __init__(self, max_size: int = WS_SUBSCRIBER_BUFFER):
+        self._buffer: deque = deque(maxlen=max_size)
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def put(self, event: Dict[str, Any]):
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(event)
+        self._ready.set()
+
+    async def get(self) -> Dict[str, Any]:
+        while not self._buffer:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._buffer.popleft()
+
+class _Channel:
+    def __init__(self, server_id: str):
+        self.server_id = server_id
+        self.subscribers: Set[Subscriber] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.connected = False
+
+    def publish(self, event: Dict[str, Any]):
+        for subscriber in self.subscribers:
+            subscriber.put(event)
+
+    async def _authenticate(self, socket) -> bool:
+        credentials = await pterodactyl_client.get_websocket_credentials(self.server_id)
+        if not credentials:
+            return False
+        await socket.send(json.dumps({"event": "auth", "args": [credentials["token"]]}))
+        return True
+
+    async def _session(self):
+        credentials = await pterodactyl_client.get_websocket_credentials(self.server_id)
+        if not credentials:
+            raise ConnectionError("Could not obtain websocket credentials")
+        # Wings rejects connections whose Origin doesn't match the panel URL
+        async with websockets.connect(credentials["socket"], origin=pterodactyl_client.base_url) as socket:
+            await socket.send(json.dumps({"event": "auth", "args": [credentials["token"]]}))
+            async for raw in socket:
+                message = json.loads(raw)
+                event = message.get("event")
+                if event == "auth success":
+                    self.connected = True
+                    await socket.send(json.dumps({"event": "send stats", "args": [None]}))
+                elif event in ("token expiring", "token expired"):
+                    if not await self._authenticate(socket):
+                        raise ConnectionError("Could not refresh websocket token")
+                elif event in FORWARDED_EVENTS:
+                    self.publish({"event": event, "args": message.get("args", [])})
+
+    async def run(self):
+        delay = WS_RECONNECT_DELAY
+        while self.subscribers:
+            try:
+                await self._session()
+                delay = WS_RECONNECT_DELAY
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in websocket for server {self.server_id}: {e}")
+            self.connected = False
+            self.publish({"event": "reconnecting", "args": []})
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WS_RECONNECT_MAX_DELAY)
+
+class ServerEventHub:
+    """Shares one upstream Pterodactyl websocket per server between all subscribers"""
+
+    def __init__(self):
+        self._channels: Dict[str, _Channel] = {}
+
+    def subscribe(self, server_id: str) -> Subscriber:
+        channel = self._channels.get(server_id)
+        if channel is None:
+            channel = _Channel(server_id)
+            self._channels[server_id] = channel
+        subscriber = Subscriber()
+        channel.subscribers.add(subscriber)
+        if channel.task is None:
+            channel.task = asyncio.create_task(channel.run())
+        return subscriber
+
+    def unsubscribe(self, server_id: str, subscriber: Subscriber):
+        channel = self._channels.get(server_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(subscriber)
+        if not channel.subscribers:
+            # Last viewer left: close the upstream connection
+            if channel.task is not None:
+                channel.task.cancel()
+            del self._channels[server_id]
+
+    async def close(self):
+        tasks = [channel.task for channel in self._channels.values() if channel.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._channels.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "channels": len(self._channels),
+            "connected": sum(1 for channel in self._channels.values() if channel.connected),
+            "subscribers": sum(len(channel.subscribers) for channel in self._channels.values()),
+            "dropped_events": sum(
+                subscriber.dropped
+                for channel in self._channels.values()
+                for subscriber in channel.subscribers
+            ),
+        }
+
+# Global instance
+server_event_hub = ServerEventHub()
@@ -1,28 +1,32 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database.connection import get_db
 from ..models.database import User as UserModel
 from ..models.schemas import User, UserCreate, Token
 from ..auth.security import (
-    verify_password, 
-    get_password_hash, 
     create_access_token, 
+    get_current_user,
     get_current_active_user,
+    oauth2_scheme,
+    revoke_token,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from ..auth.passwords import hash_password, verify_and_update_password
 from ..pterodactyl.client import pterodactyl_client
+from .conditional import respond_for_row
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
 @router.post("/register", response_model=User)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user already exists
-    db_user = db.query(UserModel).filter(
+    db_user = await db.scalar(select(UserModel).where(
         (UserModel.email == user.email) | (UserModel.username == user.username)
-    ).first()
+    ))
     if db_user:
         raise HTTPException(
             status_code=400,
@@ -43,7 +47,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create user in local database
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = UserModel(
         username=user.username,
         email=user.email,
@@ -51,15 +55,18 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         pterodactyl_id=pterodactyl_user["attributes"]["id"]
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(UserModel).filter(UserModel.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(UserModel).where(UserModel.username == form_data.username))
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -72,6 +79,11 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
             detail="Account is inactive"
         )
     
+    # Transparently upgrade hashes created with a different bcrypt cost
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -80,10 +92,16 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=User)
-async def read_users_me(current_user: UserModel = Depends(get_current_active_user)):
-    return current_user
+async def read_users_me(
+    request: Request,
+    response: Response,
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    # The user is already loaded (usually from the principal cache), so a 304 costs no queries
+    return respond_for_row(request, response, "user", current_user) or current_user
 
 @router.post("/logout")
-async def logout():
-    # In a real application, you might want to blacklist the token
+async def logout(token: str = Depends(oauth2_scheme), current_user: UserModel = Depends(get_current_user)):
+    # get_current_user has already turned away invalid and revoked tokens
+    await revoke_token(token)
     return {"message": "Successfully logged out"}
\ No newline at end of file
@@ -0,0 +1,79 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Iterable, Optional
+from fastapi import Request, Response
+
+# Clients may keep a copy but must revalidate it on every poll
+CACHE_CONTROL = "private, no-cache"
+
+def row_etag(kind: str, row_id: int, version: int) -> str:
+    """Weak ETag for a single row: the JSON differs byte-wise between encoders, the data doesn't"""
+    return f'W/"{kind}-{row_id}.{version}"'
+
+def page_etag(kind: str, rows: Iterable[Any], *extra: Any) -> str:
+    """Weak ETag for a page of rows with ``id`` and ``version``, plus anything else in the response"""
+    digest = hashlib.blake2b(digest_size=12)
+    for row in rows:
+        digest.update(f"{row.id}.{row.version},".encode())
+    digest.update(repr(extra).encode())
+    return f'W/"{kind}-{digest.hexdigest()}"'
+
+def last_modified(row: Any) -> Optional[datetime]:
+    return row.updated_at or row.created_at
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored on both sides
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def _not_modified_since(header: str, modified: Optional[datetime]) -> bool:
+    if modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    # SQLite hands back naive timestamps, which are UTC, as are HTTP dates
+    if modified.tzinfo is None:
+        modified = modified.replace(tzinfo=timezone.utc)
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified.replace(microsecond=0) <= since
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def is_fresh(request: Request, etag: str, modified: Optional[datetime] = None) -> bool:
+    """Whether the client's cached copy is current. If-Modified-Since only counts without If-None-Match."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        return _not_modified_since(if_modified_since, modified)
+    return False
+
+def set_validators(response: Response, etag: str, modified: Optional[datetime] = None):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if modified is not None:
+        if modified.tzinfo is None:
+            modified = modified.replace(tzinfo=timezone.utc)
+        response.headers["Last-Modified"] = format_datetime(modified.astimezone(timezone.utc), usegmt=True)
+
+def not_modified(etag: str, modified: Optional[datetime] = None) -> Response:
+    """Empty 304 carrying the same validators the full response would have"""
+    response = Response(status_code=304)
+    set_validators(response, etag, modified)
+    return response
+
+def respond_for_row(request: Request, response: Response, kind: str, row: Any) -> Optional[Response]:
+    """Set validators for an already loaded row; returns a 304 to send instead if the client is current"""
+    etag, modified = row_etag(kind, row.id, row.version), last_modified(row)
+    if is_fresh(request, etag, modified):
+        return not_modified(etag, modified)
+    set_validators(response, etag, modified)
+    return None
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from ..database.connection import get_db
+from ..models.database import User as UserModel, PanelImport
+from ..models.schemas import PanelImport as PanelImportSchema
+from ..auth.security import get_current_admin_user
+from ..jobs.panel_import import panel_importer, ImportInProgress
+
+router = APIRouter(prefix="/api/imports", tags=["imports"])
+
+@router.post("/", response_model=PanelImportSchema, status_code=status.HTTP_202_ACCEPTED)
+async def start_import(
+    restart: bool = False,
+    admin_user: UserModel = Depends(get_current_admin_user)
+):
+    """Import the panel's users and servers in the background, resuming an unfinished import unless restart is set"""
+    try:
+        panel_import = await panel_importer.create_or_resume(restart)
+    except ImportInProgress:
+        raise HTTPException(status_code=409, detail="An import is already running")
+    panel_importer.submit(panel_import.id)
+    return panel_import
+
+@router.get("/", response_model=List[PanelImportSchema])
+async def list_imports(
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    admin_user: UserModel = Depends(get_current_admin_user)
+):
+    return (await db.scalars(select(PanelImport).order_by(PanelImport.id.desc()).limit(limit))).all()
+
+@router.get("/{import_id}", response_model=PanelImportSchema)
+async def get_import(
+    import_id: int,
+    db: AsyncSession = Depends(get_db),
+    admin_user: UserModel = Depends(get_current_admin_user)
+):
+    panel_import = await db.get(PanelImport, import_id)
+    if not panel_import:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return panel_import
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.connection import get_db
+from ..models.database import User as UserModel, ProvisioningJob
+from ..models.schemas import ProvisioningJob as ProvisioningJobSchema
+from ..auth.security import get_current_active_user
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+@router.get("/{job_id}", response_model=ProvisioningJobSchema)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    job = await db.get(ProvisioningJob, job_id)
+    
+    if not job or (job.user_id != current_user.id and not current_user.is_admin):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
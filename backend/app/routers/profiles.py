@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List
+
+from ..models.database import User as UserModel
+from ..models.schemas import RequestProfile
+from ..auth.security import get_current_admin_user
+from ..monitoring.profiling import profile_store
+
+router = APIRouter(prefix="/api/profiles", tags=["profiling"])
+
+@router.get("/", response_model=List[RequestProfile])
+async def list_profiles(admin_user: UserModel = Depends(get_current_admin_user)):
+    return [profile.summary() for profile in profile_store.list()]
+
+@router.get("/{profile_id}")
+async def download_profile(
+    profile_id: int,
+    format: str = Query("collapsed", pattern="^(collapsed|speedscope)$"),
+    admin_user: UserModel = Depends(get_current_admin_user)
+):
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "speedscope":
+        content, media_type, filename = profile.speedscope(), "application/json", f"profile-{profile_id}.speedscope.json"
+    else:
+        content, media_type, filename = profile.collapsed(), "text/plain", f"profile-{profile_id}.folded"
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.delete("/")
+async def clear_profiles(admin_user: UserModel = Depends(get_current_admin_user)):
+    profile_store.clear()
+    return {"message": "Profiles cleared"}
@@ -0,0 +1,14 @@
+from typing import Any
+import orjson
+from fastapi.responses import ORJSONResponse
+
+# ORJSONResponse's options, plus "Z" for UTC datetimes so rows encoded here match what
+# Pydantic writes on the detail endpoints instead of ending in "+00:00"
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+class ORJSONUTCResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,110 +1,322 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-import json
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response, status, WebSocket, WebSocketDisconnect
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import asyncio
+import os
+import uuid
 
 from ..database.connection import get_db
-from ..models.database import User as UserModel, Server as ServerModel
-from ..models.schemas import Server, ServerCreate
-from ..auth.security import get_current_active_user
+from ..database.pagination import paginate, set_pagination_headers, MAX_PAGE_SIZE
+from ..database.projection import Projection
+from ..models.database import User as UserModel, Server as ServerModel, ProvisioningJob
+from ..models.schemas import (
+    Server,
+    ServerCreate,
+    ServerStatus,
+    PowerAction,
+    PowerActionResult,
+    ProvisioningJob as ProvisioningJobSchema
+)
+from ..auth.security import get_current_active_user, authenticate_token
 from ..pterodactyl.client import pterodactyl_client
+from ..pterodactyl.status_cache import server_status_cache
+from ..pterodactyl.websocket import server_event_hub
+from ..config.loader import get_config
+from ..jobs.provisioning import provisioning_queue, reserve_job, PENDING_STATUSES
+from .conditional import (
+    is_conditional,
+    is_fresh,
+    last_modified,
+    not_modified,
+    page_etag,
+    respond_for_row,
+    row_etag,
+    set_validators
+)
+from .responses import ORJSONUTCResponse
 
 router = APIRouter(prefix="/api/servers", tags=["servers"])
 
+# Maximum number of power signals a single bulk request sends at once
+POWER_CONCURRENCY = int(os.getenv("POWER_CONCURRENCY", "10"))
+
+SERVER_PROJECTION = Projection(ServerModel, Server)
+
 @router.get("/", response_model=List[Server])
 async def get_user_servers(
-    db: Session = Depends(get_db),
+    request: Request,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    server_status: Optional[str] = Query(None, alias="status"),
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    servers = db.query(ServerModel).filter(ServerModel.user_id == current_user.id).all()
-    return servers
+    # The version column feeds the ETag and is left out of the response
+    query = SERVER_PROJECTION.select(ServerModel.version).where(ServerModel.user_id == current_user.id)
+    if server_status:
+        query = query.where(ServerModel.status == server_status)
+    
+    if is_conditional(request):
+        # Check the page's versions first and only load and serialize full rows if something changed
+        versions, next_cursor, total = await paginate(
+            db, query.with_only_columns(ServerModel.id, ServerModel.version), ServerModel.id, limit, cursor, include_total
+        )
+        etag = page_etag("servers", versions, next_cursor, total)
+        if is_fresh(request, etag):
+            cached = not_modified(etag)
+            set_pagination_headers(cached, next_cursor, total)
+            return cached
+    
+    rows, next_cursor, total = await paginate(db, query, ServerModel.id, limit, cursor, include_total)
+    # The columns match the Server schema, so the rows skip ORM instances and validation
+    response = ORJSONUTCResponse(SERVER_PROJECTION.dicts(rows))
+    set_pagination_headers(response, next_cursor, total)
+    set_validators(response, page_etag("servers", rows, next_cursor, total))
+    return response
+
+async def _resolve_identifiers(db: AsyncSession, servers: List[ServerModel]):
+    """Look up the client API identifier of rows stored without one, once per row"""
+    missing = [server for server in servers if server.pterodactyl_identifier is None]
+    if not missing:
+        return
+    found = await asyncio.gather(*(pterodactyl_client.get_server(server.pterodactyl_id) for server in missing))
+    for server, upstream in zip(missing, found):
+        if upstream is not None:
+            server.pterodactyl_identifier = upstream["attributes"]["identifier"]
+    await db.commit()
 
-@router.post("/", response_model=Server)
+async def _live_status(server: ServerModel) -> ServerStatus:
+    identifier = server.pterodactyl_identifier
+    data, stale = None, False
+    if identifier is not None:
+        data, stale = await server_status_cache.get(
+            identifier,
+            lambda: pterodactyl_client.get_server_resources(identifier)
+        )
+    attributes = (data or {}).get("attributes", {})
+    return ServerStatus(
+        id=server.id,
+        pterodactyl_id=server.pterodactyl_id,
+        name=server.name,
+        state=attributes.get("current_state"),
+        resources=attributes.get("resources"),
+        stale=stale
+    )
+
+@router.get("/status", response_model=List[ServerStatus])
+async def get_user_servers_status(
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    servers = (await db.scalars(select(ServerModel).where(ServerModel.user_id == current_user.id))).all()
+    await _resolve_identifiers(db, servers)
+    # Fetch every server concurrently; the cache bounds how many upstream calls run at once
+    return await asyncio.gather(*(_live_status(server) for server in servers))
+
+@router.post("/power", response_model=List[PowerActionResult])
+async def bulk_power_action(
+    action: PowerAction,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    server_ids = list(dict.fromkeys(action.server_ids))
+    # Verify ownership of every requested server in a single query
+    owned = {
+        server.id: server
+        for server in (await db.scalars(select(ServerModel).where(
+            ServerModel.id.in_(server_ids),
+            ServerModel.user_id == current_user.id
+        ))).all()
+    }
+    await _resolve_identifiers(db, list(owned.values()))
+    semaphore = asyncio.Semaphore(POWER_CONCURRENCY)
+    
+    async def dispatch(server_id: int) -> PowerActionResult:
+        server = owned.get(server_id)
+        if server is None:
+            return PowerActionResult(server_id=server_id, success=False, detail="Server not found")
+        identifier = server.pterodactyl_identifier
+        success = False
+        if identifier is not None:
+            async with semaphore:
+                success = await pterodactyl_client.send_power_signal(identifier, action.signal)
+        if not success:
+            return PowerActionResult(server_id=server_id, success=False, detail=f"Failed to {action.signal} server")
+        server_status_cache.invalidate(identifier)
+        return PowerActionResult(server_id=server_id, success=True)
+    
+    return await asyncio.gather(*(dispatch(server_id) for server_id in server_ids))
+
+@router.post("/", response_model=ProvisioningJobSchema, status_code=status.HTTP_202_ACCEPTED)
 async def create_server(
     server: ServerCreate,
-    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    # Load configuration
-    with open("/home/runner/work/mchostpanel/mchostpanel/config.json", "r") as f:
-        config = json.load(f)
+    # Replaying a request with the same Idempotency-Key returns the original job
+    if idempotency_key:
+        existing_job = await db.scalar(select(ProvisioningJob).where(
+            ProvisioningJob.user_id == current_user.id,
+            ProvisioningJob.idempotency_key == idempotency_key
+        ))
+        if existing_job:
+            return existing_job
     
-    # Check if user has reached server limit
-    user_servers = db.query(ServerModel).filter(ServerModel.user_id == current_user.id).count()
-    max_servers = config["app_config"]["max_servers_per_user"]
-    
-    if user_servers >= max_servers:
+    if provisioning_queue.is_full():
         raise HTTPException(
-            status_code=400,
-            detail=f"You have reached the maximum number of servers ({max_servers})"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server provisioning is busy, please try again shortly",
+            headers={"Retry-After": "5"}
         )
     
-    # Check if server name already exists for this user
-    existing_server = db.query(ServerModel).filter(
-        ServerModel.user_id == current_user.id,
-        ServerModel.name == server.name
-    ).first()
+    user_id = current_user.id
+    max_servers = get_config().app.max_servers_per_user
+    job_id = str(uuid.uuid4())
     
-    if existing_server:
-        raise HTTPException(
-            status_code=400,
-            detail="Server name already exists"
-        )
+    # End the read transaction so the reservation is evaluated against fresh data
+    await db.commit()
     
-    # Create server in Pterodactyl
-    pterodactyl_server = await pterodactyl_client.create_server(
-        user_id=current_user.pterodactyl_id,
-        server_name=server.name,
-        config={"allocation_id": 1}  # Default allocation
-    )
+    # Quota and name checks happen in the same statement that reserves the job, so
+    # concurrent requests can't both slip under the limit. A job that later fails
+    # no longer counts, which releases the reservation.
+    try:
+        reserved = await reserve_job(
+            db,
+            job_id=job_id,
+            user_id=user_id,
+            name=server.name,
+            description=server.description,
+            idempotency_key=idempotency_key,
+            max_servers=max_servers
+        )
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request with the same Idempotency-Key won the race
+        await db.rollback()
+        existing_job = await db.scalar(select(ProvisioningJob).where(
+            ProvisioningJob.user_id == user_id,
+            ProvisioningJob.idempotency_key == idempotency_key
+        ))
+        if existing_job is None:
+            raise
+        return existing_job
     
-    if not pterodactyl_server:
+    if not reserved:
+        # Only the rejected path pays for working out why
+        name_taken = await db.scalar(select(func.count()).select_from(ServerModel).where(
+            ServerModel.user_id == user_id,
+            ServerModel.name == server.name
+        )) or await db.scalar(select(func.count()).select_from(ProvisioningJob).where(
+            ProvisioningJob.user_id == user_id,
+            ProvisioningJob.name == server.name,
+            ProvisioningJob.status.in_(PENDING_STATUSES)
+        ))
+        if name_taken:
+            raise HTTPException(
+                status_code=400,
+                detail="Server name already exists"
+            )
         raise HTTPException(
-            status_code=500,
-            detail="Failed to create server in Pterodactyl panel"
+            status_code=400,
+            detail=f"You have reached the maximum number of servers ({max_servers})"
         )
     
-    # Create server in local database
-    db_server = ServerModel(
-        user_id=current_user.id,
-        pterodactyl_id=pterodactyl_server["attributes"]["id"],
-        name=server.name,
-        description=server.description,
-        status="installing"
-    )
-    
-    db.add(db_server)
-    db.commit()
-    db.refresh(db_server)
+    job = await db.get(ProvisioningJob, job_id)
     
-    return db_server
+    provisioning_queue.submit(job.id)
+    return job
 
 @router.get("/{server_id}", response_model=Server)
 async def get_server(
     server_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    server = db.query(ServerModel).filter(
-        ServerModel.id == server_id,
-        ServerModel.user_id == current_user.id
-    ).first()
+    owned = (ServerModel.id == server_id, ServerModel.user_id == current_user.id)
+    if is_conditional(request):
+        # A version lookup is enough to answer a client that is already up to date
+        current = (await db.execute(select(
+            ServerModel.id, ServerModel.version, ServerModel.created_at, ServerModel.updated_at
+        ).where(*owned))).first()
+        if current:
+            etag, modified = row_etag("server", current.id, current.version), last_modified(current)
+            if is_fresh(request, etag, modified):
+                return not_modified(etag, modified)
+    
+    server = await db.scalar(select(ServerModel).where(*owned))
     
     if not server:
         raise HTTPException(status_code=404, detail="Server not found")
     
-    return server
+    return respond_for_row(request, response, "server", server) or server
+
+@router.websocket("/{server_id}/ws")
+async def server_events(
+    websocket: WebSocket,
+    server_id: int,
+    token: str,
+    db: AsyncSession = Depends(get_db)
+):
+    # Browsers cannot set headers on websocket requests, so the JWT comes in the query string
+    try:
+        user = await authenticate_token(token, db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    server = None
+    if user.is_active:
+        server = await db.scalar(select(ServerModel).where(
+            ServerModel.id == server_id,
+            ServerModel.user_id == user.id
+        ))
+    if not server:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    # The panel's websocket endpoint takes the client API identifier
+    await _resolve_identifiers(db, [server])
+    identifier = server.pterodactyl_identifier
+    # Return the DB connection to the pool before streaming for a long time
+    await db.close()
+    if identifier is None:
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    
+    await websocket.accept()
+    subscriber = server_event_hub.subscribe(identifier)
+    
+    async def forward():
+        while True:
+            await websocket.send_json(await subscriber.get())
+    
+    sender = asyncio.create_task(forward())
+    try:
+        # Clients only listen; receiving just detects the disconnect
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        server_event_hub.unsubscribe(identifier, subscriber)
 
 @router.delete("/{server_id}")
 async def delete_server(
     server_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    server = db.query(ServerModel).filter(
+    server = await db.scalar(select(ServerModel).where(
         ServerModel.id == server_id,
         ServerModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not server:
         raise HTTPException(status_code=404, detail="Server not found")
@@ -113,73 +325,85 @@ async def delete_server(
     # This would require calling the Pterodactyl API to delete the server
     
     # Delete from local database
-    db.delete(server)
-    db.commit()
+    await db.delete(server)
+    await db.commit()
     
     return {"message": "Server deleted successfully"}
 
 @router.post("/{server_id}/start")
 async def start_server(
     server_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    server = db.query(ServerModel).filter(
+    server = await db.scalar(select(ServerModel).where(
         ServerModel.id == server_id,
         ServerModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not server:
         raise HTTPException(status_code=404, detail="Server not found")
     
     # Start server via Pterodactyl API
-    success = await pterodactyl_client.start_server(str(server.pterodactyl_id))
+    await _resolve_identifiers(db, [server])
+    identifier = server.pterodactyl_identifier
+    success = identifier is not None and await pterodactyl_client.start_server(identifier)
     
     if not success:
         raise HTTPException(status_code=500, detail="Failed to start server")
     
+    server_status_cache.invalidate(identifier)
+    
     return {"message": "Server start command sent"}
 
 @router.post("/{server_id}/stop")
 async def stop_server(
     server_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    server = db.query(ServerModel).filter(
+    server = await db.scalar(select(ServerModel).where(
         ServerModel.id == server_id,
         ServerModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not server:
         raise HTTPException(status_code=404, detail="Server not found")
     
     # Stop server via Pterodactyl API
-    success = await pterodactyl_client.stop_server(str(server.pterodactyl_id))
+    await _resolve_identifiers(db, [server])
+    identifier = server.pterodactyl_identifier
+    success = identifier is not None and await pterodactyl_client.stop_server(identifier)
     
     if not success:
         raise HTTPException(status_code=500, detail="Failed to stop server")
     
+    server_status_cache.invalidate(identifier)
+    
     return {"message": "Server stop command sent"}
 
 @router.post("/{server_id}/restart")
 async def restart_server(
     server_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
-    server = db.query(ServerModel).filter(
+    server = await db.scalar(select(ServerModel).where(
         ServerModel.id == server_id,
         ServerModel.user_id == current_user.id
-    ).first()
+    ))
     
     if not server:
         raise HTTPException(status_code=404, detail="Server not found")
     
     # Restart server via Pterodactyl API
-    success = await pterodactyl_client.restart_server(str(server.pterodactyl_id))
+    await _resolve_identifiers(db, [server])
+    identifier = server.pterodactyl_identifier
+    success = identifier is not None and await pterodactyl_client.restart_server(identifier)
     
     if not success:
         raise HTTPException(status_code=500, detail="Failed to restart server")
     
+    server_status_cache.invalidate(identifier)
+    
     return {"message": "Server restart command sent"}
\ No newline at end of file
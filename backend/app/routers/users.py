@@ -1,79 +1,159 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from ..database.connection import get_db
-from ..models.database import User as UserModel, Server as ServerModel
+from ..database.connection import get_db, AsyncSessionLocal
+from ..database.pagination import paginate, set_pagination_headers, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..database.projection import Projection
+from ..models.database import User as UserModel
 from ..models.schemas import User, UserUpdate
-from ..auth.security import get_current_active_user, get_current_admin_user
+from ..auth.security import get_current_active_user, get_current_admin_user, revoke_user_tokens
+from ..auth.passwords import hash_password
+from ..auth.cache import principal_cache
+from .conditional import respond_for_row
+from .responses import ORJSONUTCResponse, dumps
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
 @router.get("/profile", response_model=User)
-async def get_profile(current_user: UserModel = Depends(get_current_active_user)):
-    return current_user
+async def get_profile(
+    request: Request,
+    response: Response,
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    return respond_for_row(request, response, "user", current_user) or current_user
 
 @router.put("/profile", response_model=User)
 async def update_profile(
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     # Check if username or email is already taken by another user
     if user_update.username and user_update.username != current_user.username:
-        existing_user = db.query(UserModel).filter(
+        existing_user = await db.scalar(select(UserModel).where(
             UserModel.username == user_update.username,
             UserModel.id != current_user.id
-        ).first()
+        ))
         if existing_user:
             raise HTTPException(status_code=400, detail="Username already taken")
     
     if user_update.email and user_update.email != current_user.email:
-        existing_user = db.query(UserModel).filter(
+        existing_user = await db.scalar(select(UserModel).where(
             UserModel.email == user_update.email,
             UserModel.id != current_user.id
-        ).first()
+        ))
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already taken")
     
     # Update user
+    old_username = current_user.username
     if user_update.username:
         current_user.username = user_update.username
     if user_update.email:
         current_user.email = user_update.email
     if user_update.password:
-        from ..auth.security import get_password_hash
-        current_user.hashed_password = get_password_hash(user_update.password)
+        current_user.hashed_password = await hash_password(user_update.password)
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    # Dropped only after the commit: a request in between would otherwise cache the old row
+    # again, and after a rename keep accepting tokens for the old username
+    principal_cache.invalidate(old_username)
+    if current_user.username != old_username:
+        principal_cache.invalidate(current_user.username)
+        # Other workers may still have the old username cached; revoking it reaches them on their
+        # next sync and keeps old tokens from working for whoever registers that name next
+        await revoke_user_tokens(old_username)
+    await db.refresh(current_user)
     return current_user
 
+# Rows fetched per round trip when streaming an export
+EXPORT_CHUNK_SIZE = 1000
+
+USER_PROJECTION = Projection(UserModel, User)
+
+def _filter_users(query, is_active: Optional[bool], is_admin: Optional[bool], username_prefix: Optional[str]):
+    if is_active is not None:
+        query = query.where(UserModel.is_active == is_active)
+    if is_admin is not None:
+        query = query.where(UserModel.is_admin == is_admin)
+    if username_prefix:
+        query = query.where(UserModel.username.startswith(username_prefix, autoescape=True))
+    return query
+
 @router.get("/", response_model=List[User])
 async def get_all_users(
-    db: Session = Depends(get_db),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    is_admin: Optional[bool] = None,
+    username_prefix: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_db),
+    admin_user: UserModel = Depends(get_current_admin_user)
+):
+    query = _filter_users(USER_PROJECTION.select(), is_active, is_admin, username_prefix)
+    rows, next_cursor, total = await paginate(db, query, UserModel.id, limit, cursor, include_total)
+    # The columns match the User schema, so the rows skip ORM instances and validation
+    response = ORJSONUTCResponse(USER_PROJECTION.dicts(rows))
+    set_pagination_headers(response, next_cursor, total)
+    return response
+
+@router.get("/export")
+async def export_users(
+    is_active: Optional[bool] = None,
+    is_admin: Optional[bool] = None,
+    username_prefix: Optional[str] = None,
+    admin_user: UserModel = Depends(get_current_admin_user)
+):
+    query = _filter_users(USER_PROJECTION.select(), is_active, is_admin, username_prefix).order_by(UserModel.id)
+    
+    async def rows():
+        # Own session so the export outlives the request's dependency scope
+        async with AsyncSessionLocal() as db:
+            # Plain rows never enter the identity map, so memory stays flat
+            result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+            async for partition in result.partitions():
+                yield b"".join(dumps(user) + b"\n" for user in USER_PROJECTION.dicts(partition))
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+@router.post("/{user_id}/deactivate", response_model=User)
+async def deactivate_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_db),
     admin_user: UserModel = Depends(get_current_admin_user)
 ):
-    users = db.query(UserModel).all()
-    return users
+    user = await db.get(UserModel, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    user.is_active = False
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate(user.username)
+    # Cached principals in other workers may still look active, so cut off the tokens too
+    await revoke_user_tokens(user.username)
+    
+    return user
 
 @router.delete("/{user_id}")
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: UserModel = Depends(get_current_admin_user)
 ):
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    user = await db.get(UserModel, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Delete user's servers first
-    servers = db.query(ServerModel).filter(ServerModel.user_id == user_id).all()
-    for server in servers:
-        db.delete(server)
-    
-    # Delete user
-    db.delete(user)
-    db.commit()
+    # Delete user; their servers go with it through the ON DELETE CASCADE foreign key
+    await db.delete(user)
+    await db.commit()
+    principal_cache.invalidate(user.username)
+    # Otherwise their tokens would work again for anyone who registers the same username
+    await revoke_user_tokens(user.username)
     
     return {"message": "User deleted successfully"}
\ No newline at end of file
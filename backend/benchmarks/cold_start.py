@@ -0,0 +1,140 @@
+"""
+Cold start benchmark: import time of the app and time until workers serve.
+
+Imports app.main in a fresh interpreter with -X importtime and prints the
+packages that take longest to load, then starts the app under uvicorn (one
+worker) and gunicorn (--workers N, using gunicorn.conf.py) and measures the
+time from spawning the server to its first 200 from /health/startup, which
+also reports each worker's own import and lifespan timings. Uses a temporary
+SQLite database unless DATABASE_URL is set, and adds an admin user to it to
+read /health/startup with; the Pterodactyl panel does not need to be reachable.
+
+    cd backend && python -m benchmarks.cold_start --workers 4
+"""
+import argparse
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict
+
+import httpx
+
+_tmpdir = tempfile.mkdtemp(prefix="mchostpanel-bench-")
+ENV = {
+    **os.environ,
+    "DATABASE_URL": os.environ.get("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db"),
+    "PTERODACTYL_URL": os.environ.get("PTERODACTYL_URL", "http://pterodactyl.invalid"),
+    "PTERODACTYL_API_KEY": os.environ.get("PTERODACTYL_API_KEY", "bench"),
+    "PTERODACTYL_ADMIN_TOKEN": os.environ.get("PTERODACTYL_ADMIN_TOKEN", "bench"),
+    "RECONCILE_ENABLED": "False",
+    "PROMETHEUS_MULTIPROC_DIR": os.path.join(_tmpdir, "metrics"),
+    "ACCESS_LOG": "",
+}
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+def import_profile(top: int):
+    """Import app.main in a new interpreter; returns wall time and the packages that took longest"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=ENV, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - started
+
+    # Sum each module's own time by top-level package, so "sqlalchemy" covers all its submodules
+    packages: Dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            packages[match.group(2).split(".")[0]] += int(match.group(1)) / 1_000_000
+    return wall, sorted(((seconds, name) for name, seconds in packages.items()), reverse=True)[:top]
+
+def admin_token() -> str:
+    """Add an admin user to the benchmark database and return a token for it"""
+    from sqlalchemy import create_engine, text
+    from app.auth.security import create_access_token
+
+    engine = create_engine(ENV["DATABASE_URL"])
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO users (username, email, hashed_password, is_active, is_admin) "
+            "SELECT 'bench-admin', 'bench-admin@example.com', 'x', 1, 1 "
+            "WHERE NOT EXISTS (SELECT 1 FROM users WHERE username = 'bench-admin')"
+        ))
+    engine.dispose()
+    return create_access_token({"sub": "bench-admin"})
+
+def time_to_ready(command, port: int, workers: int, token: str, timeout: float):
+    """Spawn a server and poll until every worker has served /health/startup"""
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=ENV, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first_ready = None
+    pids = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            # Connections are not reused, so successive polls can land on different workers
+            while time.perf_counter() - started < timeout and len(pids) < workers:
+                try:
+                    response = client.get("/health/startup", headers={
+                        "Connection": "close",
+                        "Authorization": f"Bearer {token}"
+                    })
+                except httpx.TransportError:
+                    time.sleep(0.02)
+                    continue
+                if response.status_code == 200:
+                    first_ready = first_ready or time.perf_counter() - started
+                    timings = response.json()
+                    pids[timings["pid"]] = timings
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+    return first_ready, list(pids.values())
+
+def report(name: str, first_ready, workers):
+    if first_ready is None:
+        print(f"{name:<24} did not become ready")
+        return
+    print(f"{name:<24} first response after {first_ready:.3f}s, {len(workers)} worker(s) seen")
+    for timings in workers:
+        print(f"{'':<24} pid {timings['pid']}: imports {timings['import_seconds']:.3f}s, "
+              f"startup {timings['startup_seconds']:.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--top", type=int, default=10, help="slowest packages to list")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], env=ENV, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.makedirs(ENV["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+    wall, modules = import_profile(args.top)
+    print(f"import app.main: {wall:.3f}s wall, including interpreter start")
+    for seconds, module in modules:
+        print(f"  {seconds:8.3f}s  {module}")
+    print()
+
+    token = admin_token()
+    bind = ["--port", str(args.port)]
+    report("uvicorn (1 worker)", *time_to_ready(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", *bind],
+        args.port, 1, token, args.timeout
+    ))
+    report(f"gunicorn ({args.workers} workers)", *time_to_ready(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--workers", str(args.workers),
+         "--bind", f"127.0.0.1:{args.port}", "app.main:app"],
+        args.port, args.workers, token, args.timeout
+    ))
+
+if __name__ == "__main__":
+    main()
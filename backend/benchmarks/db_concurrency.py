@@ -0,0 +1,88 @@
+"""
+Concurrency benchmark for the async database layer.
+
+Drives GET /api/servers/ in-process at increasing numbers of in-flight
+requests and prints the throughput reached at each level. Uses a temporary
+SQLite database unless DATABASE_URL is set (point it at Postgres to see the
+effect of real network round trips).
+
+    cd backend && python -m benchmarks.db_concurrency --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="mchostpanel-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+os.environ.setdefault("PTERODACTYL_URL", "http://pterodactyl.invalid")
+os.environ.setdefault("PTERODACTYL_API_KEY", "bench")
+os.environ.setdefault("PTERODACTYL_ADMIN_TOKEN", "bench")
+# Every request comes from one client, which would trip the per-IP and per-account limits
+os.environ.setdefault("RATE_LIMIT_ENABLED", "False")
+
+import httpx
+
+from app.main import app
+from app.auth.security import create_access_token
+from app.database.connection import SessionLocal, init_async_engine
+from app.database.migrations import upgrade_database
+from app.models.database import User, Server
+
+def seed(users: int, servers_per_user: int):
+    db = SessionLocal()
+    try:
+        for i in range(users):
+            user = User(
+                username=f"bench{i}",
+                email=f"bench{i}@example.com",
+                hashed_password="x",
+                pterodactyl_id=i
+            )
+            db.add(user)
+            db.flush()
+            for j in range(servers_per_user):
+                db.add(Server(user_id=user.id, pterodactyl_id=i * 100 + j, name=f"server{j}"))
+        db.commit()
+    finally:
+        db.close()
+
+async def run_level(client: httpx.AsyncClient, headers, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            response = await client.get("/api/servers/", headers=headers[i % len(headers)])
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return total / (time.perf_counter() - started)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--servers-per-user", type=int, default=3)
+    parser.add_argument("--levels", default="1,4,16,64")
+    args = parser.parse_args()
+
+    upgrade_database(os.environ["DATABASE_URL"])
+    # The app is driven without its lifespan, so create the engine it would have created
+    init_async_engine()
+    seed(args.users, args.servers_per_user)
+    headers = [
+        {"Authorization": f"Bearer {create_access_token({'sub': f'bench{i}'})}"}
+        for i in range(args.users)
+    ]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'in-flight':>10} {'req/s':>10}")
+        for level in (int(x) for x in args.levels.split(",")):
+            rps = await run_level(client, headers, args.requests, level)
+            print(f"{level:>10} {rps:>10.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
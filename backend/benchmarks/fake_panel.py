@@ -0,0 +1,234 @@
+"""
+In-process fake of the Pterodactyl panel endpoints used by app/pterodactyl/client.py.
+
+Plug it into the client with `pterodactyl_client.start(transport=panel.transport())`.
+Every response waits for a configurable latency first, and a configurable fraction of
+requests fail with a 500 (or a 429 with Retry-After) so resilience paths get exercised.
+"""
+import asyncio
+import itertools
+import json
+import random
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+def _page(items: List[Dict[str, Any]], request: httpx.Request, object_type: str) -> Dict[str, Any]:
+    page = int(request.url.params.get("page", 1))
+    per_page = int(request.url.params.get("per_page", 50))
+    total_pages = max(1, -(-len(items) // per_page))
+    chunk = items[(page - 1) * per_page:page * per_page]
+    return {
+        "object": "list",
+        "data": [{"object": object_type, "attributes": item} for item in chunk],
+        "meta": {"pagination": {"total": len(items), "current_page": page, "total_pages": total_pages}},
+    }
+
+class FakePanel:
+    """Keeps users, servers, nodes and allocations in memory and answers like the panel API"""
+
+    def __init__(self, latency: float = 0.02, jitter: float = 0.5, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, nodes: int = 2, allocations_per_node: int = 1000,
+                 node_memory: int = 1024 * 1024, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self.users: Dict[int, Dict[str, Any]] = {}
+        self.servers: Dict[int, Dict[str, Any]] = {}
+        self.nodes: Dict[int, Dict[str, Any]] = {}
+        self.allocations: Dict[int, Dict[str, Any]] = {}
+        self.calls: Counter = Counter()
+        self.injected_errors = 0
+        for node_id in range(1, nodes + 1):
+            self.nodes[node_id] = {
+                "id": node_id,
+                "name": f"node{node_id}",
+                "memory": node_memory,
+                "memory_overallocate": 0,
+                "disk": node_memory * 4,
+                "disk_overallocate": 0,
+                "maintenance_mode": False,
+            }
+            for port in range(25565, 25565 + allocations_per_node):
+                allocation_id = next(self._ids)
+                self.allocations[allocation_id] = {
+                    "id": allocation_id,
+                    "node": node_id,
+                    "ip": "127.0.0.1",
+                    "port": port,
+                    "assigned": False,
+                }
+        self._routes = [
+            ("GET", r"/api/application/users", self._list_users),
+            ("POST", r"/api/application/users", self._create_user),
+            ("GET", r"/api/application/users/(\d+)", self._get_user),
+            ("GET", r"/api/application/servers", self._list_servers),
+            ("POST", r"/api/application/servers", self._create_server),
+            ("GET", r"/api/application/servers/(\d+)", self._get_server),
+            ("GET", r"/api/application/servers/external/([^/]+)", self._get_server_by_external_id),
+            ("GET", r"/api/application/nodes", self._list_nodes),
+            ("GET", r"/api/application/nodes/(\d+)/allocations", self._list_allocations),
+            ("GET", r"/api/client", self._list_client_servers),
+            ("GET", r"/api/client/servers/([^/]+)", self._get_client_server),
+            ("GET", r"/api/client/servers/([^/]+)/resources", self._get_resources),
+            ("GET", r"/api/client/servers/([^/]+)/websocket", self._get_websocket),
+            ("POST", r"/api/client/servers/([^/]+)/power", self._power),
+        ]
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        return httpx.MockTransport(self.handle)
+
+    def add_user(self, username: str) -> Dict[str, Any]:
+        """Seed a user directly, bypassing latency and error injection"""
+        user_id = next(self._ids)
+        user = {"id": user_id, "username": username, "email": f"{username}@example.com"}
+        self.users[user_id] = user
+        return user
+
+    def add_server(self, user_id: int, node_id: int = 1, status: Optional[str] = None) -> Dict[str, Any]:
+        """Seed a server directly, bypassing latency and error injection"""
+        allocation = next(a for a in self.allocations.values() if a["node"] == node_id and not a["assigned"])
+        allocation["assigned"] = True
+        server_id = next(self._ids)
+        server = {
+            "id": server_id,
+            "external_id": None,
+            "identifier": f"{server_id:08x}",
+            "name": f"server{server_id}",
+            "user": user_id,
+            "node": node_id,
+            "allocation": allocation["id"],
+            "status": status,
+            "suspended": False,
+            "limits": {"memory": 1024, "swap": 0, "disk": 2048, "io": 500, "cpu": 100},
+            "current_state": "offline",
+        }
+        self.servers[server_id] = server
+        return server
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            spread = self.latency * self.jitter
+            await asyncio.sleep(max(0.0, self.latency + self._random.uniform(-spread, spread)))
+
+        for method, pattern, handler in self._routes:
+            match = re.fullmatch(pattern, request.url.path)
+            if method == request.method and match:
+                self.calls[handler.__name__.lstrip("_")] += 1
+                roll = self._random.random()
+                if roll < self.error_rate:
+                    self.injected_errors += 1
+                    return httpx.Response(500, json={"errors": [{"detail": "Injected failure"}]})
+                if roll < self.error_rate + self.rate_limit_rate:
+                    self.injected_errors += 1
+                    return httpx.Response(429, headers={"Retry-After": "1"})
+                return handler(request, *match.groups())
+        return httpx.Response(404, json={"errors": [{"code": "NotFoundHttpException"}]})
+
+    def _find_server(self, identifier: str) -> Optional[Dict[str, Any]]:
+        for server in self.servers.values():
+            # Like the real client API, which only knows servers by their short identifier
+            if server["identifier"] == identifier:
+                return server
+        return None
+
+    def _list_users(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=_page(list(self.users.values()), request, "user"))
+
+    def _create_user(self, request: httpx.Request) -> httpx.Response:
+        data = json.loads(request.content)
+        user_id = next(self._ids)
+        user = {"id": user_id, "username": data["username"], "email": data["email"]}
+        self.users[user_id] = user
+        return httpx.Response(201, json={"object": "user", "attributes": user})
+
+    def _get_user(self, request: httpx.Request, user_id: str) -> httpx.Response:
+        user = self.users.get(int(user_id))
+        if user is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"object": "user", "attributes": user})
+
+    def _list_servers(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=_page(list(self.servers.values()), request, "server"))
+
+    def _create_server(self, request: httpx.Request) -> httpx.Response:
+        data = json.loads(request.content)
+        external_id = data.get("external_id")
+        if external_id and any(s["external_id"] == external_id for s in self.servers.values()):
+            return httpx.Response(422, json={"errors": [{"detail": "The external id has already been taken."}]})
+        allocation = self.allocations.get(data["allocation"]["default"])
+        if allocation is None or allocation["assigned"]:
+            return httpx.Response(422, json={"errors": [{"detail": "The allocation is not available."}]})
+        allocation["assigned"] = True
+        server_id = next(self._ids)
+        server = {
+            "id": server_id,
+            "external_id": external_id,
+            "identifier": f"{server_id:08x}",
+            "name": data["name"],
+            "user": data["user"],
+            "node": allocation["node"],
+            "allocation": allocation["id"],
+            "status": None,
+            "suspended": False,
+            "limits": data["limits"],
+            "current_state": "offline",
+        }
+        self.servers[server_id] = server
+        return httpx.Response(201, json={"object": "server", "attributes": server})
+
+    def _get_server(self, request: httpx.Request, server_id: str) -> httpx.Response:
+        server = self.servers.get(int(server_id))
+        if server is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"object": "server", "attributes": server})
+
+    def _get_server_by_external_id(self, request: httpx.Request, external_id: str) -> httpx.Response:
+        for server in self.servers.values():
+            if server["external_id"] == external_id:
+                return httpx.Response(200, json={"object": "server", "attributes": server})
+        return httpx.Response(404)
+
+    def _list_nodes(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=_page(list(self.nodes.values()), request, "node"))
+
+    def _list_allocations(self, request: httpx.Request, node_id: str) -> httpx.Response:
+        allocations = [a for a in self.allocations.values() if a["node"] == int(node_id)]
+        return httpx.Response(200, json=_page(allocations, request, "allocation"))
+
+    def _list_client_servers(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=_page(list(self.servers.values()), request, "server"))
+
+    def _get_client_server(self, request: httpx.Request, identifier: str) -> httpx.Response:
+        server = self._find_server(identifier)
+        if server is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"object": "server", "attributes": server})
+
+    def _get_resources(self, request: httpx.Request, identifier: str) -> httpx.Response:
+        server = self._find_server(identifier)
+        if server is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"object": "stats", "attributes": {
+            "current_state": server["current_state"],
+            "is_suspended": server["suspended"],
+            "resources": {"memory_bytes": 0, "cpu_absolute": 0.0, "disk_bytes": 0, "uptime": 0},
+        }})
+
+    def _get_websocket(self, request: httpx.Request, identifier: str) -> httpx.Response:
+        if self._find_server(identifier) is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"data": {"token": "fake", "socket": "ws://127.0.0.1:0/ws"}})
+
+    def _power(self, request: httpx.Request, identifier: str) -> httpx.Response:
+        server = self._find_server(identifier)
+        if server is None:
+            return httpx.Response(404)
+        signal = json.loads(request.content)["signal"]
+        server["current_state"] = "running" if signal in ("start", "restart") else "offline"
+        return httpx.Response(204)
@@ -0,0 +1,246 @@
+"""
+Load benchmark for the API against an in-process fake Pterodactyl panel.
+
+Runs the real app (lifespan included) over httpx's ASGI transport with the
+Pterodactyl client wired to benchmarks.fake_panel, then drives login, list
+servers, create server and power actions at a fixed concurrency. Prints a JSON
+report with throughput and p50/p95/p99 latency per endpoint; pass --output to
+save it as a baseline and --compare to fail on regressions against one.
+
+    cd backend && python -m benchmarks.load --output baseline.json
+    cd backend && python -m benchmarks.load --compare baseline.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+_tmpdir = tempfile.mkdtemp(prefix="mchostpanel-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+os.environ.setdefault("PTERODACTYL_URL", "http://panel.bench")
+os.environ.setdefault("PTERODACTYL_API_KEY", "bench")
+os.environ.setdefault("PTERODACTYL_ADMIN_TOKEN", "bench")
+# Every request comes from one client, which would trip the per-IP and per-account limits
+os.environ.setdefault("RATE_LIMIT_ENABLED", "False")
+os.environ.setdefault("RECONCILE_ENABLED", "False")
+os.environ.setdefault("PROVISION_POLL_INTERVAL", "0.1")
+
+import httpx
+
+from app.main import app
+from app.auth.passwords import pwd_context
+from app.config.loader import config_service
+from app.database.connection import SessionLocal
+from app.database.migrations import upgrade_database
+from app.models.database import User, Server
+from app.pterodactyl.client import pterodactyl_client
+from app.jobs.provisioning import provisioning_queue
+from .fake_panel import FakePanel
+
+PASSWORD = "bench-password"
+SCENARIOS = ("login", "list_servers", "create_server", "power")
+
+def write_config(max_servers: int) -> str:
+    """Copy config.json with a quota high enough for the create scenario"""
+    with open(config_service.path) as f:
+        data = json.load(f)
+    data["app_config"]["max_servers_per_user"] = max_servers
+    path = os.path.join(_tmpdir, "config.json")
+    with open(path, "w") as f:
+        json.dump(data, f)
+    return path
+
+def seed(panel: FakePanel, users: int, servers_per_user: int) -> Dict[str, List[int]]:
+    """Create users and servers both locally and on the fake panel; returns server IDs by username"""
+    hashed_password = pwd_context.hash(PASSWORD)
+    servers: Dict[str, List[int]] = {}
+    db = SessionLocal()
+    try:
+        for i in range(users):
+            username = f"bench{i}"
+            pterodactyl_id = panel.add_user(username)["id"]
+            user = User(username=username, email=f"{username}@example.com", hashed_password=hashed_password,
+                        pterodactyl_id=pterodactyl_id)
+            db.add(user)
+            db.flush()
+            rows = []
+            for j in range(servers_per_user):
+                upstream = panel.add_server(pterodactyl_id, node_id=1 + j % len(panel.nodes))
+                rows.append(Server(user_id=user.id, pterodactyl_id=upstream["id"],
+                                   pterodactyl_identifier=upstream["identifier"], name=f"seed{j}", status="installed"))
+            db.add_all(rows)
+            db.flush()
+            servers[username] = [row.id for row in rows]
+        db.commit()
+    finally:
+        db.close()
+    return servers
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+async def run_scenario(requests: int, concurrency: int, call: Callable[[int], Awaitable[httpx.Response]]) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                code = str((await call(i)).status_code)
+            except Exception as e:
+                code = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for code, count in statuses.items() if not code.startswith("2"))
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "statuses": statuses,
+        "throughput_rps": round(requests / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+    }
+
+async def wait_for_provisioning(jobs: int, timeout: float) -> Dict[str, Any]:
+    """Wait for the accepted create requests to finish provisioning through the fake panel"""
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        stats = provisioning_queue.stats()
+        if stats["completed"] + stats["failed"] >= jobs:
+            break
+        await asyncio.sleep(0.1)
+    stats = provisioning_queue.stats()
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    return stats
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a description of every endpoint that got slower or less reliable than the baseline"""
+    regressions = []
+    for name, current in report["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("p95", "p99"):
+            before, after = previous["latency_ms"][metric], current["latency_ms"][metric]
+            if before and after > before * (1 + tolerance):
+                regressions.append(f"{name} {metric} {before}ms -> {after}ms")
+        before, after = previous["throughput_rps"], current["throughput_rps"]
+        if after < before * (1 - tolerance):
+            regressions.append(f"{name} throughput {before} -> {after} req/s")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name} errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--servers-per-user", type=int, default=5)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.02, help="fake panel latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of panel calls that fail with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of panel calls answered with 429")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="baseline JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+
+    upgrade_database(os.environ["DATABASE_URL"])
+    panel = FakePanel(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        allocations_per_node=args.users * args.servers_per_user + args.requests,
+        seed=args.seed
+    )
+    servers = seed(panel, args.users, args.servers_per_user)
+    usernames = list(servers)
+    config_service.path = write_config(args.requests + args.servers_per_user)
+    await pterodactyl_client.start(transport=panel.transport())
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "servers_per_user": args.servers_per_user,
+            "panel_latency": args.latency,
+            "panel_error_rate": args.error_rate,
+            "panel_rate_limit_rate": args.rate_limit_rate,
+        },
+        "endpoints": {},
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            tokens = {}
+            for username in usernames:
+                response = await client.post("/api/auth/login", data={"username": username, "password": PASSWORD})
+                response.raise_for_status()
+                tokens[username] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            names = itertools.count()
+            calls = {
+                "login": lambda i: client.post(
+                    "/api/auth/login", data={"username": usernames[i % len(usernames)], "password": PASSWORD}
+                ),
+                "list_servers": lambda i: client.get("/api/servers/", headers=tokens[usernames[i % len(usernames)]]),
+                "create_server": lambda i: client.post(
+                    "/api/servers/", json={"name": f"bench-{next(names)}"}, headers=tokens[usernames[i % len(usernames)]]
+                ),
+                "power": lambda i: client.post(
+                    f"/api/servers/{servers[usernames[i % len(usernames)]][i % args.servers_per_user]}/start",
+                    headers=tokens[usernames[i % len(usernames)]]
+                ),
+            }
+            for name in args.scenarios.split(","):
+                report["endpoints"][name] = await run_scenario(args.requests, args.concurrency, calls[name])
+
+            if "create_server" in report["endpoints"]:
+                accepted = report["endpoints"]["create_server"]["statuses"].get("202", 0)
+                report["provisioning"] = await wait_for_provisioning(accepted, timeout=120)
+    report["panel_calls"] = dict(panel.calls)
+    report["panel_injected_errors"] = panel.injected_errors
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,88 @@
+"""
+Throughput check for importing an existing panel.
+
+Seeds the in-process fake panel with --users users owning --servers servers
+between them, runs a full import into a temporary SQLite database (unless
+DATABASE_URL is set), and reports objects per second and the time spent per
+batch. The fake panel answers every page after --latency seconds, and the
+client keeps to PTERODACTYL_APPLICATION_RATE_LIMIT (240 pages a minute by
+default), which at 100 objects a page bounds an import long before writing
+rows does. Raise the limit to see the database side on its own. Exits
+non-zero if any row is missing or duplicated.
+
+    cd backend && python -m benchmarks.panel_import --users 10000 --servers 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="mchostpanel-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+os.environ.setdefault("PTERODACTYL_URL", "http://pterodactyl.invalid")
+os.environ.setdefault("PTERODACTYL_API_KEY", "bench")
+os.environ.setdefault("PTERODACTYL_ADMIN_TOKEN", "bench")
+
+from sqlalchemy import func, select
+
+from app.auth.passwords import password_pool
+from app.config.loader import config_service
+from app.database.connection import AsyncSessionLocal, DATABASE_URL, init_async_engine, dispose_async_engine
+from app.database.migrations import upgrade_database
+from app.jobs.panel_import import PanelImporter
+from app.models.database import User, Server
+from app.pterodactyl.client import pterodactyl_client
+from .fake_panel import FakePanel
+
+async def count(model) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(model))
+
+async def run(args) -> bool:
+    panel = FakePanel(latency=args.latency, nodes=1, allocations_per_node=args.servers, seed=1)
+    owners = [panel.add_user(f"user{i}")["id"] for i in range(args.users)]
+    for i in range(args.servers):
+        panel.add_server(owners[i % len(owners)])
+
+    config_service.load()
+    init_async_engine()
+    password_pool.start()
+    await pterodactyl_client.start(transport=panel.transport())
+    try:
+        importer = PanelImporter(page_size=args.page_size, batch_size=args.batch_size)
+        panel_import = await importer.create_or_resume()
+        started = time.perf_counter()
+        await importer.run(panel_import.id)
+        elapsed = time.perf_counter() - started
+        users, servers = await count(User), await count(Server)
+    finally:
+        password_pool.shutdown()
+        await pterodactyl_client.close()
+        await dispose_async_engine()
+
+    total = args.users + args.servers
+    print(f"imported {users} users and {servers} servers in {elapsed:.2f}s "
+          f"({total / elapsed:.0f} objects/s, {importer.batches} batches of "
+          f"{importer.last_batch_duration * 1000:.0f} ms writing the last, "
+          f"{panel.calls['list_users'] + panel.calls['list_servers']} page requests)")
+    return users == args.users and servers == args.servers
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--servers", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake panel takes per page")
+    args = parser.parse_args()
+
+    upgrade_database(DATABASE_URL)
+    ok = asyncio.run(run(args))
+    if not ok:
+        print("FAIL: row counts do not match the panel")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
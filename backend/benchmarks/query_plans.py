@@ -0,0 +1,64 @@
+"""
+Query-plan check for the hot server/user queries.
+
+Migrates a temporary SQLite database to head, runs EXPLAIN QUERY PLAN on the
+queries issued by the routers and the reconciler, and exits non-zero if any of
+them falls back to a full table scan. Also checks that one UPDATE bumps a row's
+version by exactly 1, since the version and updated_at triggers could otherwise
+fire each other.
+
+    cd backend && python -m benchmarks.query_plans
+"""
+import sys
+import tempfile
+
+_tmpdir = tempfile.mkdtemp(prefix="mchostpanel-plans-")
+DATABASE_URL = f"sqlite:///{_tmpdir}/plans.db"
+
+from sqlalchemy import create_engine, text
+
+from app.database.migrations import upgrade_database
+
+HOT_QUERIES = {
+    "list servers of a user": "SELECT * FROM servers WHERE user_id = 1 ORDER BY id LIMIT 101",
+    "list servers of a user after cursor": "SELECT * FROM servers WHERE user_id = 1 AND id > 10 ORDER BY id LIMIT 101",
+    "count servers of a user": "SELECT count(*) FROM servers WHERE user_id = 1",
+    "server owned by user": "SELECT * FROM servers WHERE id = 5 AND user_id = 1",
+    "server name taken": "SELECT * FROM servers WHERE user_id = 1 AND name = 'survival'",
+    "server by pterodactyl id": "SELECT * FROM servers WHERE pterodactyl_id = 42",
+    "user by username": "SELECT * FROM users WHERE username = 'steve'",
+    "active provisioning jobs": "SELECT * FROM provisioning_jobs WHERE status IN ('queued', 'creating', 'installing')",
+}
+
+def check_versions(connection) -> int:
+    """Run one plain UPDATE per table and return how many bumped the version by other than 1"""
+    connection.execute(text(
+        "INSERT INTO users (username, email, hashed_password) VALUES ('steve', 'steve@example.com', 'x')"
+    ))
+    connection.execute(text("INSERT INTO servers (user_id, pterodactyl_id, name, status) VALUES (1, 42, 'survival', 'active')"))
+    failures = 0
+    for table, change in (("users", "is_active = 0"), ("servers", "status = 'suspended'")):
+        before = connection.execute(text(f"SELECT version FROM {table} WHERE id = 1")).scalar()
+        connection.execute(text(f"UPDATE {table} SET {change} WHERE id = 1"))
+        after = connection.execute(text(f"SELECT version, updated_at FROM {table} WHERE id = 1")).one()
+        ok = after[0] == before + 1 and after[1] is not None
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':>4}  {table} version after one UPDATE: {before} -> {after[0]}")
+    connection.rollback()
+    return failures
+
+def main() -> int:
+    upgrade_database(DATABASE_URL)
+    engine = create_engine(DATABASE_URL)
+    failures = 0
+    with engine.connect() as connection:
+        for name, query in HOT_QUERIES.items():
+            plan = [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {query}"))]
+            full_scan = any(step.startswith("SCAN") and "INDEX" not in step for step in plan)
+            failures += full_scan
+            print(f"{'FAIL' if full_scan else 'ok':>4}  {name}: {'; '.join(plan)}")
+        failures += check_versions(connection)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Concurrency stress check for server quota enforcement.
+
+Fires many POST /api/servers/ requests for a single user at once and checks
+that no more than max_servers_per_user jobs were accepted, and that a burst
+reusing one server name is accepted exactly once. Uses a temporary SQLite
+database unless DATABASE_URL is set (point it at Postgres to exercise the
+row lock path). Exits non-zero if the limit was exceeded.
+
+    cd backend && python -m benchmarks.quota_stress --requests 100
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from collections import Counter
+
+_tmpdir = tempfile.mkdtemp(prefix="mchostpanel-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+os.environ.setdefault("PTERODACTYL_URL", "http://pterodactyl.invalid")
+os.environ.setdefault("PTERODACTYL_API_KEY", "bench")
+os.environ.setdefault("PTERODACTYL_ADMIN_TOKEN", "bench")
+# Every request comes from one client, which would trip the per-IP and per-account limits
+os.environ.setdefault("RATE_LIMIT_ENABLED", "False")
+
+import httpx
+from sqlalchemy import func, select
+
+from app.main import app
+from app.auth.security import create_access_token
+from app.config.loader import config_service
+from app.database.connection import SessionLocal, init_async_engine
+from app.database.migrations import upgrade_database
+from app.models.database import User, ProvisioningJob
+
+def seed(username: str) -> int:
+    db = SessionLocal()
+    try:
+        user = User(username=username, email=f"{username}@example.com", hashed_password="x", pterodactyl_id=1)
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+def count_jobs(user_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return db.scalar(select(func.count()).select_from(ProvisioningJob).where(ProvisioningJob.user_id == user_id))
+    finally:
+        db.close()
+
+async def burst(client: httpx.AsyncClient, headers, names) -> Counter:
+    async def one(name: str) -> int:
+        response = await client.post("/api/servers/", json={"name": name}, headers=headers)
+        return response.status_code
+
+    return Counter(await asyncio.gather(*(one(name) for name in names)))
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    upgrade_database(os.environ["DATABASE_URL"])
+    # The app is driven without its lifespan, so create the engine it would have created
+    init_async_engine()
+    config_service.load()
+    max_servers = config_service.get().app.max_servers_per_user
+    ok = True
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        user_id = seed("quota")
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'quota'})}"}
+        statuses = await burst(client, headers, [f"server{i}" for i in range(args.requests)])
+        accepted = count_jobs(user_id)
+        print(f"distinct names: {dict(statuses)}, jobs stored: {accepted}, limit: {max_servers}")
+        ok &= statuses[202] == accepted == min(max_servers, args.requests)
+
+        user_id = seed("names")
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'names'})}"}
+        statuses = await burst(client, headers, ["same"] * args.requests)
+        accepted = count_jobs(user_id)
+        print(f"same name:      {dict(statuses)}, jobs stored: {accepted}")
+        ok &= statuses[202] == accepted == 1
+
+    print("OK" if ok else "FAILED: quota or name uniqueness was violated")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,144 @@
+"""
+Serialization microbenchmark for large User and Server listings.
+
+Seeds a temporary SQLite database and, for each table, times three ways of
+turning a listing into a JSON body:
+
+  orm+pydantic+json    ORM instances validated through the from_attributes schema,
+                       dumped to JSON-ready data and encoded with the stdlib json
+                       module (what list endpoints used to do)
+  orm+pydantic+orjson  the same, encoded by the default ORJSONUTCResponse
+  projection+orjson    schema columns only, rows turned into dicts by Projection
+                       and encoded by ORJSONUTCResponse (what list endpoints do now)
+
+Load time (query plus building objects) and encode time are reported
+separately, as the best of --repeat runs, along with rows per second overall.
+Every path must produce the same document. SQLite hands back naive
+timestamps, so the projection path is also checked against Pydantic with
+timezone-aware ones, as Postgres returns them.
+
+    cd backend && python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import json
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+_tmpdir = tempfile.mkdtemp(prefix="mchostpanel-bench-")
+DATABASE_URL = f"sqlite:///{_tmpdir}/bench.db"
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.database.migrations import upgrade_database
+from app.database.projection import Projection
+from app.models.database import User as UserModel, Server as ServerModel
+from app.models.schemas import User, Server
+from app.routers.responses import ORJSONUTCResponse
+
+def seed(engine, rows: int):
+    with engine.begin() as connection:
+        connection.execute(insert(UserModel), [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x" * 60,
+             "pterodactyl_id": i}
+            for i in range(1, rows + 1)
+        ])
+        connection.execute(insert(ServerModel), [
+            {"user_id": i % rows + 1, "pterodactyl_id": i, "name": f"server{i}",
+             "description": "Survival server with a handful of plugins", "status": "running"}
+            for i in range(1, rows + 1)
+        ])
+
+def pydantic_path(model, schema, render: Callable[[Any], bytes]):
+    adapter = TypeAdapter(List[schema])
+
+    def load(session: Session):
+        return session.scalars(select(model).order_by(model.id)).all()
+
+    def encode(objects) -> bytes:
+        # FastAPI validates the return value against response_model, then hands the JSON-ready data to the response
+        return render(adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json"))
+
+    return load, encode
+
+def projection_path(model, schema):
+    projection = Projection(model, schema)
+
+    def load(session: Session):
+        return projection.dicts(session.execute(projection.select().order_by(model.id)).all())
+
+    def encode(rows) -> bytes:
+        return ORJSONUTCResponse(rows).body
+
+    return load, encode
+
+def check_aware(engine, model, schema, rows: int = 100):
+    """Projection rows with UTC-aware timestamps encode exactly as Pydantic writes them"""
+    projection = Projection(model, schema)
+    with Session(engine) as session:
+        data = projection.dicts(session.execute(projection.select().order_by(model.id).limit(rows)).all())
+    moment = datetime(2026, 10, 17, 12, 0, 0, 123000, tzinfo=timezone.utc)
+    for row in data:
+        for key in row:
+            if key.endswith("_at"):
+                row[key] = moment
+    adapter = TypeAdapter(List[schema])
+    expected = json.loads(adapter.dump_json(adapter.validate_python(data)))
+    assert json.loads(ORJSONUTCResponse(data).body) == expected, f"{model.__tablename__} aware timestamps differ"
+
+def measure(engine, load, encode, repeat: int) -> Tuple[float, float, int]:
+    best_load = best_encode = float("inf")
+    size = 0
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            data = load(session)
+            loaded = time.perf_counter()
+            body = encode(data)
+            finished = time.perf_counter()
+        best_load = min(best_load, loaded - started)
+        best_encode = min(best_encode, finished - loaded)
+        size = len(body)
+    return best_load, best_encode, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    upgrade_database(DATABASE_URL)
+    engine = create_engine(DATABASE_URL)
+    seed(engine, args.rows)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'listing':<8} {'path':<20} {'load ms':>9} {'encode ms':>10} {'rows/s':>10} {'bytes':>10}")
+    for name, model, schema in (("users", UserModel, User), ("servers", ServerModel, Server)):
+        paths = {
+            "orm+pydantic+json": pydantic_path(model, schema, lambda data: JSONResponse(data).body),
+            "orm+pydantic+orjson": pydantic_path(model, schema, lambda data: ORJSONUTCResponse(data).body),
+            "projection+orjson": projection_path(model, schema),
+        }
+        bodies = {}
+        for path, (load, encode) in paths.items():
+            load_time, encode_time, size = measure(engine, load, encode, args.repeat)
+            rate = args.rows / (load_time + encode_time)
+            print(f"{name:<8} {path:<20} {load_time * 1000:>9.1f} {encode_time * 1000:>10.1f} {rate:>10.0f} {size:>10}")
+            results.setdefault(name, {})[path] = rate
+            with Session(engine) as session:
+                bodies[path] = json.loads(encode(load(session)))
+        # Every path has to produce the same document, or the comparison means nothing
+        assert all(body == bodies["orm+pydantic+json"] for body in bodies.values()), f"{name} bodies differ"
+        check_aware(engine, model, schema)
+
+    print()
+    for name, rates in results.items():
+        baseline = rates["orm+pydantic+json"]
+        print(f"{name}: projection+orjson is {rates['projection+orjson'] / baseline:.1f}x the old path")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# Production server settings: gunicorn -c gunicorn.conf.py app.main:app
+import multiprocessing
+import os
+import shutil
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+# Read by the app to split the panel's rate limits between the workers
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master and fork workers from it, so they start faster and
+# share its memory pages. Safe because the app only creates pools and tasks in its lifespan.
+preload_app = os.getenv("GUNICORN_PRELOAD", "True").lower() == "true"
+
+# Seconds a stopping worker gets to finish in-flight requests and run its shutdown drain
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+# Empty to turn the access log off
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+
+# Workers write their metrics to this directory so /metrics reports all of them
+prometheus_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/mchostpanel-metrics")
+os.makedirs(prometheus_dir, exist_ok=True)
+
+def on_starting(server):
+    # Drop samples left by workers of a previous run
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,77 @@
+"""Baseline schema
+
+Creates the tables that earlier releases built with Base.metadata.create_all.
+Tables that already exist are left untouched, so existing databases can be
+upgraded in place without stamping.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("is_admin", sa.Boolean(), nullable=True),
+            sa.Column("pterodactyl_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "servers" not in existing:
+        op.create_table(
+            "servers",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("pterodactyl_id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_servers_id", "servers", ["id"])
+
+    if "provisioning_jobs" not in existing:
+        op.create_table(
+            "provisioning_jobs",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("idempotency_key", sa.String(), nullable=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=True),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("server_id", sa.Integer(), nullable=True),
+            sa.Column("pterodactyl_id", sa.Integer(), nullable=True),
+            sa.Column("claimed_until", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.UniqueConstraint("user_id", "idempotency_key", name="uq_provisioning_jobs_user_id_idempotency_key"),
+        )
+        op.create_index("ix_provisioning_jobs_user_id", "provisioning_jobs", ["user_id"])
+        op.create_index("ix_provisioning_jobs_status", "provisioning_jobs", ["status"])
+
+def downgrade():
+    op.drop_table("provisioning_jobs")
+    op.drop_table("servers")
+    op.drop_table("users")
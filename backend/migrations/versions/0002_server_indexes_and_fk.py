@@ -0,0 +1,40 @@
+"""Index servers and tie them to their owner
+
+Adds the (user_id, id) index used by every per-user server query, a unique
+(user_id, name) constraint that replaces the racy pre-insert check, an index
+on pterodactyl_id for reconciliation lookups, and a cascading foreign key to
+users.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Rows these constraints would reject: servers of deleted users and duplicate names
+    op.execute("DELETE FROM servers WHERE user_id NOT IN (SELECT id FROM users)")
+    op.execute(
+        "UPDATE servers SET name = name || '-' || id "
+        "WHERE id NOT IN (SELECT MIN(id) FROM servers GROUP BY user_id, name)"
+    )
+
+    with op.batch_alter_table("servers") as batch_op:
+        batch_op.create_index("ix_servers_user_id_id", ["user_id", "id"])
+        batch_op.create_index("ix_servers_pterodactyl_id", ["pterodactyl_id"])
+        batch_op.create_unique_constraint("uq_servers_user_id_name", ["user_id", "name"])
+        batch_op.create_foreign_key(
+            "fk_servers_user_id_users", "users", ["user_id"], ["id"], ondelete="CASCADE"
+        )
+
+def downgrade():
+    with op.batch_alter_table("servers") as batch_op:
+        batch_op.drop_constraint("fk_servers_user_id_users", type_="foreignkey")
+        batch_op.drop_constraint("uq_servers_user_id_name", type_="unique")
+        batch_op.drop_index("ix_servers_pterodactyl_id")
+        batch_op.drop_index("ix_servers_user_id_id")
@@ -0,0 +1,52 @@
+"""Maintain updated_at in the database
+
+The ORM only sets updated_at for updates it issues itself. These triggers keep
+the column current for bulk UPDATEs and manual changes as well.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TABLES = ("users", "servers", "provisioning_jobs")
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("""
+            CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+            BEGIN
+                NEW.updated_at = now();
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        for table in TABLES:
+            op.execute(
+                f"CREATE TRIGGER trg_{table}_updated_at BEFORE UPDATE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+            )
+    elif dialect == "sqlite":
+        for table in TABLES:
+            # Only fires when the statement didn't set updated_at itself, so it can't recurse
+            op.execute(
+                f"CREATE TRIGGER trg_{table}_updated_at AFTER UPDATE ON {table} "
+                f"FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at "
+                f"BEGIN UPDATE {table} SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid; END"
+            )
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for table in TABLES:
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_updated_at ON {table}")
+        op.execute("DROP FUNCTION IF EXISTS set_updated_at()")
+    elif dialect == "sqlite":
+        for table in TABLES:
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_updated_at")
@@ -0,0 +1,77 @@
+"""Add row versions to users and servers
+
+A version counter that the database bumps on every UPDATE, bulk ones
+included. Read endpoints build their ETags from it, so a conditional GET can
+be answered from the versions alone. updated_at isn't enough for this since
+it only has second resolution on SQLite.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+TABLES = ("users", "servers")
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("""
+            CREATE OR REPLACE FUNCTION bump_version() RETURNS trigger AS $$
+            BEGIN
+                NEW.version = OLD.version + 1;
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        for table in TABLES:
+            op.execute(
+                f"CREATE TRIGGER trg_{table}_version BEFORE UPDATE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION bump_version()"
+            )
+    elif dialect == "sqlite":
+        for table in TABLES:
+            # A trigger's UPDATE fires the table's other triggers (recursive_triggers only stops a
+            # trigger from firing itself), so a separate version trigger would be bumped again by
+            # the updated_at trigger's UPDATE. Fold both into one trigger that can't re-fire itself.
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_updated_at")
+            op.execute(
+                f"CREATE TRIGGER trg_{table}_version AFTER UPDATE ON {table} "
+                f"FOR EACH ROW WHEN NEW.version IS OLD.version OR NEW.updated_at IS OLD.updated_at "
+                f"BEGIN UPDATE {table} SET "
+                f"version = CASE WHEN NEW.version IS OLD.version THEN OLD.version + 1 ELSE NEW.version END, "
+                f"updated_at = CASE WHEN NEW.updated_at IS OLD.updated_at THEN CURRENT_TIMESTAMP ELSE NEW.updated_at END "
+                f"WHERE rowid = NEW.rowid; END"
+            )
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for table in TABLES:
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_version ON {table}")
+        op.execute("DROP FUNCTION IF EXISTS bump_version()")
+    elif dialect == "sqlite":
+        for table in TABLES:
+            op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_version")
+
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("version")
+
+    if dialect == "sqlite":
+        # Put back the updated_at triggers from 0003, after the table rebuilds above
+        for table in TABLES:
+            op.execute(
+                f"CREATE TRIGGER trg_{table}_updated_at AFTER UPDATE ON {table} "
+                f"FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at "
+                f"BEGIN UPDATE {table} SET updated_at = CURRENT_TIMESTAMP WHERE rowid = NEW.rowid; END"
+            )
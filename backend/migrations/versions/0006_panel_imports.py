@@ -0,0 +1,45 @@
+"""Track bulk imports from the Pterodactyl panel
+
+One row per import run, holding its phase, the next page to fetch and
+running totals, so an interrupted import resumes where it stopped. Also
+indexes users.pterodactyl_id, which imports look up a page at a time.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+COUNTERS = (
+    "users_seen", "users_created", "users_linked", "users_skipped",
+    "servers_seen", "servers_created", "servers_updated", "servers_skipped",
+)
+
+def upgrade():
+    op.create_table(
+        "panel_imports",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("phase", sa.String(), nullable=True),
+        sa.Column("next_page", sa.Integer(), nullable=True),
+        sa.Column("total_pages", sa.Integer(), nullable=True),
+        *(sa.Column(name, sa.Integer(), nullable=True) for name in COUNTERS),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("claimed_until", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_panel_imports_status", "panel_imports", ["status"])
+    op.create_index("ix_users_pterodactyl_id", "users", ["pterodactyl_id"])
+
+def downgrade():
+    op.drop_index("ix_users_pterodactyl_id", table_name="users")
+    op.drop_index("ix_panel_imports_status", table_name="panel_imports")
+    op.drop_table("panel_imports")
@@ -0,0 +1,28 @@
+"""Elect one process to run background work
+
+Under a prefork server every worker would otherwise poll the panel and run
+provisioning. The worker holding the row in this table does it alone, and
+another takes over once its lease expires.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "background_leases",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("holder", sa.String(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+
+def downgrade():
+    op.drop_table("background_leases")
@@ -0,0 +1,24 @@
+"""Store each server's client API identifier
+
+The client API (resources, power, websocket) addresses servers by their short
+identifier rather than the numeric id the application API uses. Rows created
+before this are filled in the first time they are needed.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("servers", sa.Column("pterodactyl_identifier", sa.String(), nullable=True))
+
+def downgrade():
+    # A plain DROP COLUMN (SQLite 3.35+) keeps the table, and with it the 0004 version trigger
+    op.drop_column("servers", "pterodactyl_identifier")
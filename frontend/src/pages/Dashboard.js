@@ -205,7 +205,7 @@ const Dashboard = () => {
 
     try {
       await serverAPI.createServer(newServer);
-      toast.success('Server created successfully!');
+      toast.success('Server provisioning started!');
       setShowCreateModal(false);
       setNewServer({ name: '', description: '' });
       fetchServers();
@@ -62,4 +62,8 @@ export const serverAPI = {
   restartServer: (serverId) => api.post(`/api/servers/${serverId}/restart`),
 };
 
+export const jobAPI = {
+  getJob: (jobId) => api.get(`/api/jobs/${jobId}`),
+};
+
 export default api;
\ No newline at end of file